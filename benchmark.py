@@ -0,0 +1,230 @@
+"""
+Замеры производительности NormaText на синтетических документах.
+
+Генерирует .docx от 10 до 10 000 абзацев (заголовки с нумерацией, списки,
+таблицы, разные шрифты и размеры, запрещённые слова) и отдельно замеряет
+загрузку, каждую функцию check_*, auto_fix_terminology и сохранение (save_document).
+
+Пример:
+    python benchmark.py --sizes 10,100,1000,10000 --repeat 3 --output bench.json
+    python benchmark.py --output new.json --compare bench.json
+
+Результаты пишутся в JSON, чтобы сравнивать версии между собой.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from docx import Document
+from docx.shared import Pt
+
+import core
+from dictionaries import FORBIDDEN_WORDS
+
+DEFAULT_SIZES = (10, 100, 1000, 10000)
+
+# Доля абзацев основного текста с запрещённым словом
+FORBIDDEN_RATE = 0.1
+
+# Во сколько раз замедление считается регрессией при сравнении (--compare)
+DEFAULT_THRESHOLD = 1.25
+
+_WORDS = (
+    "документ организация приказ исполнение контроль срок работа отдел сотрудник "
+    "порядок требование проект согласование подпись дата отчёт результат система "
+    "обеспечение выполнение договор поставка оплата решение совещание комиссия"
+).split()
+
+_FONTS = ("Times New Roman", "Times New Roman", "Times New Roman", "Arial")
+_SIZES = (14, 14, 12, 11)
+
+
+def generate_document(paragraphs: int, seed: int = 0):
+    # Синтетический документ примерно из paragraphs абзацев.
+    # Одинаковый seed даёт одинаковый документ, поэтому замеры сравнимы.
+    rng = random.Random(seed)
+    forbidden = sorted(FORBIDDEN_WORDS)
+    doc = Document()
+
+    doc.add_paragraph("ПРИКАЗ")
+    doc.add_paragraph(f"от 01.12.2025 № {seed + 1}")
+
+    section = subsection = 0
+    count = 2
+    while count < paragraphs:
+        roll = rng.random()
+        if roll < 0.05:
+            section += 1
+            subsection = 0
+            doc.add_heading(f"{section} Раздел {section}", 1)
+        elif roll < 0.12 and section:
+            subsection += 1
+            doc.add_heading(f"{section}.{subsection} Подраздел", 2)
+        elif roll < 0.2:
+            style = rng.choice(("List Bullet", "List Number"))
+            doc.add_paragraph(_sentence(rng, forbidden, 6), style=style)
+        elif roll < 0.21:
+            table = doc.add_table(rows=3, cols=3)
+            for cell in table._cells:
+                cell.text = _sentence(rng, forbidden, 3)
+            count += 9
+            continue
+        else:
+            paragraph = doc.add_paragraph()
+            for _ in range(rng.randint(1, 3)):
+                run = paragraph.add_run(_sentence(rng, forbidden, rng.randint(8, 30)) + " ")
+                run.font.name = rng.choice(_FONTS)
+                run.font.size = Pt(rng.choice(_SIZES))
+        count += 1
+
+    return doc
+
+
+def _sentence(rng: random.Random, forbidden: List[str], length: int) -> str:
+    words = [rng.choice(_WORDS) for _ in range(length)]
+    if rng.random() < FORBIDDEN_RATE:
+        words[rng.randrange(length)] = rng.choice(forbidden)
+    return " ".join(words).capitalize() + "."
+
+
+def _best(action: Callable, repeat: int, setup: Optional[Callable] = None) -> float:
+    # Лучшее время из repeat запусков; setup() готовит аргумент и в замер не входит
+    times = []
+    for _ in range(repeat):
+        argument = setup() if setup else None
+        started = time.perf_counter()
+        action(argument) if setup else action()
+        times.append(time.perf_counter() - started)
+    return min(times)
+
+
+def benchmark_size(paragraphs: int, repeat: int, workdir: Path) -> dict:
+    path = workdir / f"bench_{paragraphs}.docx"
+    generate_document(paragraphs, seed=paragraphs).save(path)
+    document = core.load_document(path)
+    doc_type = "приказ"
+
+    checks = {
+        "check_terminology": lambda: core.check_terminology(document),
+        "check_structure": lambda: core.check_structure(document, doc_type),
+        "check_required_fields": lambda: core.check_required_fields(document, doc_type),
+        "check_formatting": lambda: core.check_formatting(document),
+        "check_paragraphs_structure": lambda: core.check_paragraphs_structure(document),
+        "check_lists_formatting": lambda: core.check_lists_formatting(document),
+        "check_fonts_and_sizes": lambda: core.check_fonts_and_sizes(document),
+        "check_numbering": lambda: core.check_numbering(document, doc_type),
+        "run_checks_streaming": lambda: core.run_checks(path, doc_type, core.CHECK_CATEGORIES),
+        "run_checks_parallel": lambda: core.run_checks(document, doc_type, core.CHECK_CATEGORIES,
+                                                       jobs=os.cpu_count() or 1),
+    }
+
+    timings = {"load_document": _best(lambda: core.load_document(path), repeat)}
+    for name, action in checks.items():
+        timings[name] = _best(action, repeat)
+
+    # Исправление меняет документ, поэтому каждый запуск — на свежей копии
+    timings["auto_fix_terminology"] = _best(core.auto_fix_terminology, repeat,
+                                            setup=lambda: core.load_document(path))
+    fixed = core.load_document(path)
+    core.auto_fix_terminology(fixed)
+    # save_document, а не save_fixed_document: та превращает ошибку сохранения в строку,
+    # и неудачное сохранение попало бы в замеры как обычное
+    fixed_path = workdir / f"bench_{paragraphs}_исправленный.docx"
+    timings["save_fixed_document"] = _best(lambda: core.save_document(fixed, fixed_path, path), repeat)
+
+    snapshot = core.scan_document(path)
+    return {
+        "paragraphs": len(snapshot.paragraphs),
+        "file_bytes": path.stat().st_size,
+        "timings": {name: round(seconds, 6) for name, seconds in timings.items()},
+    }
+
+
+def run_benchmark(sizes, repeat: int = 3) -> dict:
+    # Прогревает морфологический анализатор, чтобы его загрузка не попала в замеры
+    core.get_morph()
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            results.append({"size": size, **benchmark_size(size, repeat, Path(tmp))})
+    return {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float = DEFAULT_THRESHOLD) -> List[str]:
+    # Замедления больше threshold раз относительно baseline (по одинаковым размерам)
+    previous = {item["size"]: item["timings"] for item in baseline.get("results", [])}
+    regressions = []
+    for item in current["results"]:
+        old = previous.get(item["size"])
+        if not old:
+            continue
+        for name, seconds in item["timings"].items():
+            before = old.get(name)
+            if before and seconds > before * threshold:
+                regressions.append(
+                    f"{name} ({item['size']} абз.): {before:.4f} с -> {seconds:.4f} с "
+                    f"(x{seconds / before:.2f})"
+                )
+    return regressions
+
+
+def _print_table(report: dict, out=sys.stderr):
+    names = list(report["results"][0]["timings"]) if report["results"] else []
+    out.write(f"{'функция':<28}" + "".join(f"{item['size']:>12}" for item in report["results"]) + "\n")
+    for name in names:
+        row = "".join(f"{item['timings'][name] * 1000:>10.1f}мс" for item in report["results"])
+        out.write(f"{name:<28}{row}\n")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Замеры производительности NormaText")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="размеры документов в абзацах через запятую")
+    parser.add_argument("--repeat", type=int, default=3, help="число повторов (берётся лучшее время)")
+    parser.add_argument("--output", help="файл для результатов JSON (по умолчанию — стандартный вывод)")
+    parser.add_argument("--compare", help="JSON предыдущего запуска для поиска регрессий")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="допустимое замедление при сравнении, раз")
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+
+    report = run_benchmark(sizes, args.repeat)
+    _print_table(report)
+
+    data = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(data + "\n", encoding="utf-8")
+    else:
+        print(data)
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        regressions = compare(report, baseline, args.threshold)
+        for line in regressions:
+            sys.stderr.write(f"Регрессия: {line}\n")
+        return 1 if regressions else 0
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,12 +2,28 @@
 Ядро логики NormaText: работа с документом, проверка по ГОСТ, лемматизация.
 """
 
-from docx import Document
-import pymorphy3
-from dataclasses import dataclass
-from typing import List, Tuple, Optional
+from array import array
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from dataclasses import dataclass, field, replace
+from functools import lru_cache
+import io
+import multiprocessing
+import os
+import posixpath
+import stat
+import struct
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+import zlib
+from typing import Dict, Iterator, List, Tuple, Optional
 import re
-from dictionaries import FORBIDDEN_WORDS, TERMINOLOGY_REPLACEMENTS
+from lxml import etree
+from lexicon import (INFLECT_CATEGORIES, Lexicon, current_lexicon, grammemes, inflect_replacement,
+                     lexicon_inflections)
 
 @dataclass
 class Heading:
@@ -17,15 +33,196 @@ class Heading:
     paragraph_index: int # Номер абзаца в документе
     number: str         # Номер (например, "1", "1.1", "2.3.1")
 
-# Инициализация морфологического анализатора (один раз для всего приложения)
-_morph = pymorphy3.MorphAnalyzer()
+
+# Шаблоны сообщений по идентификатору правила
+RULE_MESSAGES = {
+    "terminology.forbidden": "Недопустимое слово «{text}» (основа: «{lemma}»)",
+    "structure.required_field": "Отсутствует обязательный реквизит: '{text}'",
+    "structure.alignment": "Рекомендуется выравнивание по ширине или левому краю",
+    "structure.uppercase": "Избегайте написания всего текста в верхнем регистре",
+    "structure.long_paragraph": "Абзац слишком длинный (разбейте на несколько)",
+    "structure.empty_between_headings": "Между заголовками должен быть текст",
+    "structure.empty_list_item": "Пустой элемент списка",
+    "structure.empty_numbered_item": "Пустой элемент нумерованного списка",
+    "structure.fonts": "Обнаружены нерекомендуемые шрифты: {text} (ГОСТ: Times New Roman)",
+    "structure.font_sizes": "Несоответствие размеров шрифта: {text}",
+    "structure.date": "Возможно отсутствует дата документа",
+    "numbering.no_headings": "Документ не содержит заголовков с нумерацией",
+    "numbering.format": "Неверный формат номера '{text}' для уровня {level}",
+    "numbering.first": "Первый номер на уровне {level} должен быть 1, а не {actual}",
+    "numbering.sequence": "Ожидался номер {expected}, а не {actual} на уровне {level}",
+    "numbering.missing": "Заголовок уровня {level} не содержит номера",
+}
+
+# Категории проверки (как в интерфейсе) по префиксу идентификатора правила
+RULE_CATEGORIES = {
+    "terminology": "терминология",
+    "structure": "структура",
+    "numbering": "нумерация",
+}
+
+
+@dataclass(slots=True)
+class Finding:
+    # Найденное нарушение. Текст сообщения строится только при выводе (str()),
+    # поэтому фильтрация, группировка и сериализация обходятся без разбора строк.
+    rule: str                              # Идентификатор правила, ключ RULE_MESSAGES
+    severity: str                          # "error" или "warning"
+    paragraph: Optional[int] = None        # Номер абзаца (с нуля); None — документ в целом
+    span: Optional[Tuple[int, int]] = None # Позиция нарушения в тексте абзаца
+    text: str = ""                         # Найденный фрагмент или значение для сообщения
+    lemma: str = ""                        # Нормальная форма (для терминологии)
+    suggestion: Optional[str] = None       # Предлагаемая замена ("" — удалить)
+    params: Optional[dict] = None          # Прочие подробности для сообщения
+    location: Optional[str] = None         # Таблица, колонтитул или сноска; None — основной текст
+
+    @property
+    def category(self) -> str:
+        return RULE_CATEGORIES.get(self.rule.split('.', 1)[0], "")
+
+    @property
+    def message(self) -> str:
+        return RULE_MESSAGES[self.rule].format(text=self.text, lemma=self.lemma, **(self.params or {}))
+
+    @property
+    def place(self) -> Optional[str]:
+        # Место нарушения для вывода; None — документ в целом
+        if self.location is not None:
+            place = self.location[:1].upper() + self.location[1:]
+            if self.paragraph is not None:
+                place += f", абз. {self.paragraph + 1}"
+            return place
+        if self.paragraph is None:
+            return None
+        return f"Стр. {self.paragraph + 1}"
+
+    def __str__(self) -> str:
+        place = self.place
+        if place is None:
+            return f"• {self.message}"
+        return f"• {place}: {self.message}"
+
+    def to_dict(self) -> dict:
+        return {
+            "rule": self.rule,
+            "severity": self.severity,
+            "paragraph": self.paragraph,
+            "span": list(self.span) if self.span else None,
+            "text": self.text,
+            "lemma": self.lemma,
+            "suggestion": self.suggestion,
+            "params": self.params,
+            "location": self.location,
+            "message": str(self),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Finding":
+        span = data.get("span")
+        return cls(
+            rule=data["rule"],
+            severity=data["severity"],
+            paragraph=data.get("paragraph"),
+            span=tuple(span) if span else None,
+            text=data.get("text", ""),
+            lemma=data.get("lemma", ""),
+            suggestion=data.get("suggestion"),
+            params=data.get("params"),
+            location=data.get("location")
+        )
+
+
+def render_findings(findings: List[Finding]) -> List[str]:
+    # Текстовые сообщения для вывода на экран и в отчёт
+    return [str(finding) for finding in findings]
+
+
+@dataclass(slots=True)
+class RunSnapshot:
+    # Фрагмент (run) абзаца: только то, что нужно проверкам шрифтов
+    text: str
+    font_name: Optional[str]  # Имя шрифта с учётом стилей, если оно известно
+    size_pt: Optional[float]  # Размер в пунктах с учётом стилей, если он известен
+
+
+@dataclass(slots=True)
+class ParagraphSnapshot:
+    # Компактный снимок абзаца, прочитанный из XML один раз
+    index: int                    # Номер абзаца в документе (с нуля)
+    text: str
+    style_name: str
+    alignment: Optional[int]      # 0=left, 1=center, 2=right, 3=justify
+    runs: List[RunSnapshot] = field(default_factory=list)
+    heading_level: Optional[int] = None  # Уровень заголовка по стилю
+    area: str = "body"            # body, table, header, footer или footnote
+    location: Optional[str] = None  # Где находится абзац; None — основной текст
+
+    @property
+    def in_body(self) -> bool:
+        # Абзац основного текста (номер совпадает с document.paragraphs)
+        return self.location is None
+
+    @property
+    def is_heading(self) -> bool:
+        return self.heading_level is not None or self.style_name.startswith('Heading')
+
+
+@dataclass
+class DocumentSnapshot:
+    # Снимок всего документа, по которому работают все проверки
+    paragraphs: List[ParagraphSnapshot]
+
+
+# Морфологический анализатор создаётся один раз при первом обращении:
+# загрузка словарей OpenCorpora стоит сотни миллисекунд и десятки МБ,
+# а проверки структуры и нумерации в ней не нуждаются
+_morph = None
+_morph_lock = threading.Lock()
+
+
+def get_morph():
+    # Возвращает общий для приложения анализатор pymorphy3
+    global _morph
+    if _morph is None:
+        with _morph_lock:
+            if _morph is None:
+                import pymorphy3
+                _morph = pymorphy3.MorphAnalyzer()
+    return _morph
+
+
+def warm_up_morph() -> threading.Thread:
+    # Создаёт анализатор в фоновом потоке, пока пользователь выбирает файл
+    thread = threading.Thread(target=get_morph, daemon=True)
+    thread.start()
+    return thread
+
+# Максимальное число словоформ в кэше лемм
+LEMMA_CACHE_SIZE = 50000
+
+
+@lru_cache(maxsize=LEMMA_CACHE_SIZE)
+def _lemmatize(word: str) -> str:
+    # Нормальная форма слова; word передаётся в нижнем регистре.
+    # Деловой текст повторяет одни и те же словоформы, поэтому кэш общий
+    # для всего процесса и сохраняется между документами.
+    return get_morph().parse(word)[0].normal_form
+
+
+def lemma_cache_info():
+    # Статистика кэша лемм: hits, misses, maxsize, currsize
+    return _lemmatize.cache_info()
+
 
 def load_document(file_path):
-    # Загружает .docx-документ.
+    # Загружает .docx-документ целиком (дерево python-docx).
+    # Нужно только для исправления и сохранения: проверки читают файл потоково.
+    from docx import Document
     return Document(file_path)
 
 def save_fixed_document(document, original_path):
-    # Сохраняет исправленный документ
+    # Сохраняет исправленный документ рядом с исходным: неизменённые части
+    # (рисунки, стили и т. п.) переносятся из исходного файла без пересжатия
     from pathlib import Path
 
     original = Path(original_path)
@@ -33,298 +230,1771 @@ def save_fixed_document(document, original_path):
     new_path = original.parent / new_name
 
     try:
-        document.save(new_path)
+        save_document(document, new_path, original)
         return f"Документ сохранён: {new_path}"
     except Exception as e:
         return f"Ошибка сохранения: {str(e)}"
 
-def check_terminology(document):
-    # Проверяет документ на наличие запрещённых слов.
-    errors = []
-    all_lines = [(i + 1, p.text) for i, p in enumerate(document.paragraphs) if p.text.strip()]
 
-    for line_num, text in all_lines:
-        words = text.split()
-        for word in words:
-            clean = word.strip(".,;:!?\"'()[]{}—–-")
-            if not clean or not clean.isalpha():
-                continue
+# Размер блока при копировании сжатых данных части
+_RAW_COPY_CHUNK = 1024 * 1024
+
+
+class _PatchingZipWriter:
+    # Заменяет запись zip-архива python-docx (PhysPkgWriter): часть, которая
+    # совпадает с частью исходного файла по имени, размеру и CRC-32, копируется
+    # из него сжатыми байтами, без распаковки и повторного сжатия;
+    # остальные части сжимаются заново. В rewritten — имена переписанных частей.
+
+    def __init__(self, source: Optional[zipfile.ZipFile], target: zipfile.ZipFile):
+        self.source = source
+        self.target = target
+        self.rewritten: List[str] = []
+
+    def write(self, pack_uri, blob: bytes):
+        name = pack_uri.membername
+        info = self.source.NameToInfo.get(name) if self.source is not None else None
+
+        if (info is not None and info.file_size == len(blob) and info.CRC == zlib.crc32(blob)
+                and not info.flag_bits & 0x1):
+            self._copy_raw(info)
+        else:
+            self.target.writestr(name, blob, compress_type=zipfile.ZIP_DEFLATED)
+            self.rewritten.append(name)
+
+    def _copy_raw(self, info: zipfile.ZipInfo):
+        # Сжатые данные части начинаются после её локального заголовка
+        source_fp = self.source.fp
+        source_fp.seek(info.header_offset)
+        header = source_fp.read(zipfile.sizeFileHeader)
+        name_length, extra_length = struct.unpack("<HH", header[26:30])
+        source_fp.seek(info.header_offset + zipfile.sizeFileHeader + name_length + extra_length)
+
+        copied = zipfile.ZipInfo(info.filename, info.date_time)
+        copied.compress_type = info.compress_type
+        copied.external_attr = info.external_attr
+        copied.file_size = info.file_size
+        copied.compress_size = info.compress_size
+        copied.CRC = info.CRC
+        # Размеры и CRC известны заранее, дескриптор данных после части не нужен
+        copied.flag_bits = info.flag_bits & ~0x08
+
+        target = self.target
+        target.fp.seek(target.start_dir)
+        copied.header_offset = target.fp.tell()
+        target.fp.write(copied.FileHeader())
+        remaining = info.compress_size
+        while remaining:
+            chunk = source_fp.read(min(remaining, _RAW_COPY_CHUNK))
+            if not chunk:
+                raise zipfile.BadZipFile(f"часть {info.filename} обрывается")
+            target.fp.write(chunk)
+            remaining -= len(chunk)
+
+        target.filelist.append(copied)
+        target.NameToInfo[copied.filename] = copied
+        target.start_dir = target.fp.tell()
+        target._didModify = True
+
+    def close(self):
+        pass
+
+
+def _write_package(package, target: zipfile.ZipFile, source: Optional[zipfile.ZipFile]) -> List[str]:
+    # Повторяет OpcPackage.save python-docx, но пишет части через _PatchingZipWriter
+    from docx.opc.pkgwriter import PackageWriter
+
+    for part in package.parts:
+        part.before_marshal()
+    writer = _PatchingZipWriter(source, target)
+    PackageWriter._write_content_types_stream(writer, package.parts)
+    PackageWriter._write_pkg_rels(writer, package.rels)
+    PackageWriter._write_parts(writer, package.parts)
+    return writer.rewritten
+
+
+def _new_file_mode() -> int:
+    # Права нового файла с учётом umask, как у open(). umask читается из /proc:
+    # os.umask его меняет, а сохранение идёт рядом с другими потоками приложения
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("Umask:"):
+                    return 0o666 & ~int(line.split()[1], 8)
+    except (OSError, ValueError):
+        pass
+    umask = os.umask(0o022)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+def save_document(document, path, source=None) -> List[str]:
+    # Атомарно сохраняет документ python-docx в path: архив пишется во временный
+    # файл рядом и заменяет path только целиком. Если задан source (исходный
+    # .docx), неизменённые части переносятся из него без пересжатия и
+    # переписываются только правленые части XML. Возвращает имена переписанных частей.
+    path = os.fspath(path)
+    fd, tmp_path = tempfile.mkstemp(suffix=".docx", dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with os.fdopen(fd, "wb") as tmp:
+            original = None
+            if source is not None:
+                try:
+                    original = zipfile.ZipFile(source)
+                except (OSError, zipfile.BadZipFile):
+                    # Исходный файл недоступен или испорчен: все части пишутся заново
+                    original = None
             try:
-                normal_form = _morph.parse(clean.lower())[0].normal_form
-                if normal_form in FORBIDDEN_WORDS:
-                    errors.append(
-                        f"• Стр. {line_num}: Недопустимое слово «{clean}» (основа: «{normal_form}»)"
-                    )
-            except Exception:
+                with zipfile.ZipFile(tmp, "w", zipfile.ZIP_DEFLATED) as target:
+                    rewritten = _write_package(document.part.package, target, original)
+            finally:
+                if original is not None:
+                    original.close()
+
+        # mkstemp создаёт файл только для владельца: права берутся у заменяемого
+        # файла, а для нового — по umask
+        try:
+            mode = stat.S_IMODE(os.stat(path).st_mode)
+        except FileNotFoundError:
+            mode = _new_file_mode()
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    return rewritten
+
+
+# Как часто (в абзацах) сообщать о ходе проверки и проверять её отмену
+PROGRESS_STEP = 50
+
+
+class CheckCancelled(Exception):
+    # Проверка остановлена пользователем
+    pass
+
+
+def profiling_enabled() -> bool:
+    # Профилирование проверок включается переменной окружения NORMATEXT_PROFILE=1
+    return os.environ.get("NORMATEXT_PROFILE") == "1"
+
+
+class MemoryBudgetExceeded(Exception):
+    # Процесс превысил заданный бюджет памяти во время проверки
+    pass
+
+
+def memory_budget_mb() -> Optional[float]:
+    # Бюджет памяти процесса из NORMATEXT_MEMORY_BUDGET_MB (None — без ограничения)
+    value = os.environ.get("NORMATEXT_MEMORY_BUDGET_MB")
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+def peak_memory_mb() -> Optional[float]:
+    # Пиковый объём резидентной памяти (RSS) процесса за всё время работы, МБ;
+    # None, если ОС его не сообщает (Windows)
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux сообщает килобайты, macOS — байты
+    return peak / (1 << 20) if sys.platform == "darwin" else peak / 1024
+
+
+def memory_usage_mb() -> Optional[float]:
+    # Текущий RSS процесса, МБ. Точное значение есть только в Linux (/proc),
+    # в остальных ОС возвращается пиковое
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1 << 20)
+    except (OSError, ValueError, AttributeError):
+        return peak_memory_mb()
+
+
+def _check_memory_budget(budget_mb: Optional[float]):
+    if budget_mb is None:
+        return
+    used = memory_usage_mb()
+    if used is not None and used > budget_mb:
+        raise MemoryBudgetExceeded(f"превышен бюджет памяти: {used:.0f} МБ из {budget_mb:.0f} МБ")
+
+
+@dataclass
+class CheckProfile:
+    # Замеры одной проверки документа (заполняются, только если профиль передан):
+    # время чтения и каждой проверки, объём текста, кэш лемм и число узлов XML
+    scan_seconds: float = 0.0
+    checkers: Dict[str, float] = field(default_factory=dict)  # Имя проверки -> секунды
+    paragraphs: int = 0
+    words: int = 0
+    xml_nodes: int = 0
+    lemma_hits: int = 0
+    lemma_misses: int = 0
+    cached: bool = False  # Результат взят из кэша результатов, проверки не выполнялись
+    peak_rss_mb: Optional[float] = None  # Пиковая память процесса после проверки
+
+    @property
+    def total_seconds(self) -> float:
+        return self.scan_seconds + sum(self.checkers.values())
+
+    def to_dict(self) -> dict:
+        return {
+            "scan_seconds": round(self.scan_seconds, 6),
+            "checkers": {name: round(seconds, 6) for name, seconds in self.checkers.items()},
+            "total_seconds": round(self.total_seconds, 6),
+            "paragraphs": self.paragraphs,
+            "words": self.words,
+            "xml_nodes": self.xml_nodes,
+            "lemma_hits": self.lemma_hits,
+            "lemma_misses": self.lemma_misses,
+            "cached": self.cached,
+            "peak_rss_mb": None if self.peak_rss_mb is None else round(self.peak_rss_mb, 1),
+        }
+
+    def render(self) -> List[str]:
+        # Строки для текстового отчёта
+        if self.cached:
+            return ["Результат взят из кэша, проверки не выполнялись"]
+        lines = [f"Чтение документа: {self.scan_seconds * 1000:.1f} мс"]
+        for name, seconds in sorted(self.checkers.items(), key=lambda item: -item[1]):
+            lines.append(f"{name}: {seconds * 1000:.1f} мс")
+        lines.extend([
+            f"Всего: {self.total_seconds * 1000:.1f} мс",
+            f"Абзацев: {self.paragraphs}, слов: {self.words}, узлов XML: {self.xml_nodes}",
+            f"Кэш лемм: попаданий {self.lemma_hits}, промахов {self.lemma_misses}",
+        ])
+        if self.peak_rss_mb is not None:
+            lines.append(f"Пиковая память процесса: {self.peak_rss_mb:.1f} МБ")
+        return lines
+
+
+def _report_progress(stage: str, done: int, total: int, progress, cancel):
+    # progress(этап, обработано абзацев, всего абзацев); cancel — threading.Event
+    if cancel is not None and cancel.is_set():
+        raise CheckCancelled()
+    if progress is not None:
+        progress(stage, done, total)
+
+
+def scan_document(document, progress=None, cancel=None, profile: Optional[CheckProfile] = None) -> DocumentSnapshot:
+    # Читает документ ровно один раз и строит снимок документа.
+    # python-docx заново создаёт объекты абзацев и разбирает XML при каждом
+    # обращении, поэтому все проверки работают по снимку, а не по документу.
+    # В снимок попадают все абзацы с текстом: основной текст, таблицы,
+    # колонтитулы и сноски (см. iter_blocks).
+    # Вместо документа можно передать путь к .docx или открытый файл (например,
+    # BytesIO): тогда файл читается потоково (iter_docx_paragraphs), без
+    # построения дерева python-docx.
+    if isinstance(document, DocumentSnapshot):
+        return document
+
+    started = time.perf_counter()
+    source, total = _paragraph_source(document, profile)
+    paragraphs = []
+    for paragraph in source:
+        paragraphs.append(paragraph)
+        if len(paragraphs) % PROGRESS_STEP == 0:
+            _report_progress("чтение документа", len(paragraphs), total, progress, cancel)
+    _report_progress("чтение документа", len(paragraphs), total or len(paragraphs), progress, cancel)
+
+    if profile is not None:
+        profile.scan_seconds += time.perf_counter() - started
+        profile.paragraphs += len(paragraphs)
+        profile.words += sum(len(_WORD_RE.findall(paragraph.text)) for paragraph in paragraphs)
+    return DocumentSnapshot(paragraphs)
+
+
+def _paragraph_source(document, profile: Optional[CheckProfile] = None) -> Tuple[Iterator[ParagraphSnapshot], int]:
+    # Снимки абзацев документа по одному и их число (0, если заранее неизвестно)
+    if isinstance(document, DocumentSnapshot):
+        return iter(document.paragraphs), len(document.paragraphs)
+    if isinstance(document, (str, os.PathLike, io.IOBase)):
+        return iter_docx_paragraphs(document, profile), 0
+
+    styles = _document_style_table(document)
+    if styles is not None:
+        # Абзацы python-docx разбираются из их XML так же, как при потоковом чтении
+        return (_snapshot_block(block, styles, profile) for block in iter_blocks(document)), 0
+
+    paragraphs = document.paragraphs
+    return (_snapshot_paragraph(i, paragraph) for i, paragraph in enumerate(paragraphs)), len(paragraphs)
+
+
+# Пространства имён OOXML
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_RELS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+_OFFICE_DOCUMENT_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"
+_STYLES_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles"
+_HEADER_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/header"
+_FOOTER_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/footer"
+_FOOTNOTES_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/footnotes"
+
+# Части документа кроме основного текста, которые тоже проверяются (в этом порядке):
+# тип связи -> область
+_STORY_AREAS = {_HEADER_REL: "header", _FOOTER_REL: "footer", _FOOTNOTES_REL: "footnote"}
+_STORY_ORDER = {rel_type: i for i, rel_type in enumerate(_STORY_AREAS)}
+_AREA_NAMES = {"header": "верхний колонтитул", "footer": "нижний колонтитул"}
+
+# Значения w:jc и соответствующие им WD_PARAGRAPH_ALIGNMENT
+_ALIGNMENTS = {
+    "left": 0, "start": 0, "center": 1, "right": 2, "end": 2, "both": 3, "distribute": 4,
+    "mediumKashida": 5, "highKashida": 7, "lowKashida": 8, "thaiDistribute": 9,
+}
+
+# Встроенные стили, имена которых в styles.xml пишутся со строчной буквы
+_UI_STYLE_NAMES = {"caption": "Caption", "footer": "Footer", "header": "Header"}
+_UI_STYLE_NAMES.update({f"heading {i}": f"Heading {i}" for i in range(1, 10)})
+
+
+@dataclass(slots=True)
+class Block:
+    # Абзац документа с указанием, где он находится
+    index: int                     # Номер абзаца в своём контейнере (в основном тексте — как в document.paragraphs)
+    element: object                # Элемент w:p
+    area: str                      # body, table, header, footer или footnote
+    location: Optional[str]        # Описание места, например "таблица 3, строка 2, ячейка 1"
+    raw_part: object = None        # Часть, которую python-docx хранит байтами (сноски)
+
+
+class _StoryWalker:
+    # Обходит дочерние элементы контейнера (тело документа, ячейка, колонтитул,
+    # сноска) по порядку и выдаёт абзацы, в том числе из таблиц и полей
+    # содержимого. Работает как генератор: большие таблицы не копируются в списки.
+
+    def __init__(self, area: str, location: Optional[str] = None):
+        self.area = area
+        self.location = location
+        self.paragraphs = 0
+        self.tables = 0
+        self.controls = 0
+
+    def child(self, element) -> Iterator[Block]:
+        tag = element.tag
+        if tag == f"{_W}p":
+            yield Block(self.paragraphs, element, self.area, self.location)
+            self.paragraphs += 1
+        elif tag == f"{_W}tbl":
+            self.tables += 1
+            yield from _iter_table(element, "table" if self.area == "body" else self.area,
+                                   _join_location(self.location, f"таблица {self.tables}"))
+        elif tag == f"{_W}sdt":
+            self.controls += 1
+            content = element.find(f"{_W}sdtContent")
+            if content is not None:
+                yield from _iter_story(content, self.area, _join_location(self.location, f"поле {self.controls}"))
+
+
+def _iter_story(container, area: str, location: Optional[str] = None) -> Iterator[Block]:
+    walker = _StoryWalker(area, location)
+    for element in container.iterchildren():
+        yield from walker.child(element)
+
+
+def _iter_table(table, area: str, location: str) -> Iterator[Block]:
+    for row_number, row in enumerate(table.iterchildren(f"{_W}tr"), 1):
+        for cell_number, cell in enumerate(row.iterchildren(f"{_W}tc"), 1):
+            yield from _iter_story(cell, area, f"{location}, строка {row_number}, ячейка {cell_number}")
+
+
+def _join_location(location: Optional[str], part: str) -> str:
+    return f"{location}, {part}" if location else part
+
+
+def _iter_story_parts(parts) -> Iterator[Block]:
+    # Абзацы колонтитулов и сносок. parts: (тип связи, имя части, корневой элемент),
+    # упорядоченные по типу и имени части; колонтитулы нумеруются внутри своего типа.
+    numbers = {}
+    for rel_type, _, root in parts:
+        area = _STORY_AREAS[rel_type]
+        if area == "footnote":
+            for footnote in root.iterchildren(f"{_W}footnote"):
+                # Разделители сносок (w:type) текста не содержат
+                if footnote.get(f"{_W}type") is None:
+                    yield from _iter_story(footnote, area, f"сноска {footnote.get(f'{_W}id')}")
+            continue
+        numbers[area] = numbers.get(area, 0) + 1
+        yield from _iter_story(root, area, f"{_AREA_NAMES[area]} {numbers[area]}")
+
+
+def iter_blocks(document) -> Iterator[Block]:
+    # Все абзацы документа python-docx в порядке документа: основной текст
+    # вместе с таблицами, затем колонтитулы и сноски.
+    # Части, которые python-docx хранит только байтами (сноски), разбираются
+    # заново; чтобы сохранить правки в них, см. Block.raw_part.
+    from docx.oxml.parser import parse_xml
+
+    yield from _iter_story(document.element.body, "body")
+
+    parts = {}
+    for rel in document.part.rels.values():
+        if not rel.is_external and rel.reltype in _STORY_AREAS:
+            parts[str(rel.target_part.partname)] = (rel.reltype, rel.target_part)
+
+    for partname in sorted(parts, key=lambda name: (_STORY_ORDER[parts[name][0]], name)):
+        rel_type, part = parts[partname]
+        root = getattr(part, "element", None)
+        if root is not None:
+            yield from _iter_story_parts([(rel_type, partname, root)])
+            continue
+
+        for block in _iter_story_parts([(rel_type, partname, parse_xml(part.blob))]):
+            block.raw_part = part
+            yield block
+
+
+def iter_docx_paragraphs(file_path, profile: Optional[CheckProfile] = None) -> Iterator[ParagraphSnapshot]:
+    # Потоково читает абзацы .docx через lxml.iterparse. Обработанные элементы
+    # основного текста сразу удаляются из дерева, поэтому расходуемая память
+    # не зависит от размера документа. Абзацы, их порядок и номера совпадают
+    # с iter_blocks для того же документа, открытого в python-docx.
+    with zipfile.ZipFile(file_path) as package:
+        document_part = _main_document_part(package)
+        rels = _document_rels(package, document_part)
+        default_styles = posixpath.join(posixpath.dirname(document_part), "styles.xml")
+        styles = _read_style_table(package, rels.get(_STYLES_REL, [default_styles])[0])
+
+        with package.open(document_part) as stream:
+            walker = _StoryWalker("body")
+            body_tag = f"{_W}body"
+            for _, element in etree.iterparse(stream, events=("end",),
+                                              tag=(f"{_W}p", f"{_W}tbl", f"{_W}sdt")):
+                parent = element.getparent()
+                if parent is None or parent.tag != body_tag:
+                    # Вложенные абзацы разбираются вместе с таблицей или полем
+                    continue
+
+                for block in walker.child(element):
+                    yield _snapshot_block(block, styles, profile)
+
+                element.clear(keep_tail=True)
+                while element.getprevious() is not None:
+                    del parent[0]
+
+        # Колонтитулы и сноски невелики и читаются целиком
+        names = sorted(
+            (_STORY_ORDER[rel_type], name, rel_type)
+            for rel_type in _STORY_AREAS
+            for name in set(rels.get(rel_type, []))
+            if name in package.NameToInfo
+        )
+        parts = ((rel_type, name, etree.fromstring(package.read(name))) for _, name, rel_type in names)
+        for block in _iter_story_parts(parts):
+            yield _snapshot_block(block, styles, profile)
+
+
+def _main_document_part(package: zipfile.ZipFile) -> str:
+    # Имя основной части документа по связям пакета (обычно word/document.xml)
+    try:
+        rels = etree.fromstring(package.read("_rels/.rels"))
+    except KeyError:
+        return "word/document.xml"
+    for rel in rels.iter(f"{_RELS}Relationship"):
+        if rel.get("Type") == _OFFICE_DOCUMENT_REL:
+            return rel.get("Target").lstrip("/")
+    return "word/document.xml"
+
+
+def _document_rels(package: zipfile.ZipFile, document_part: str) -> dict:
+    # Связи основной части: тип связи -> имена частей внутри пакета
+    folder, name = posixpath.split(document_part)
+    rels = {}
+    try:
+        root = etree.fromstring(package.read(posixpath.join(folder, "_rels", name + ".rels")))
+    except KeyError:
+        return rels
+    for rel in root.iter(f"{_RELS}Relationship"):
+        if rel.get("TargetMode") == "External":
+            continue
+        target = rel.get("Target")
+        if target.startswith("/"):
+            target = target.lstrip("/")
+        else:
+            target = posixpath.normpath(posixpath.join(folder, target))
+        rels.setdefault(rel.get("Type"), []).append(target)
+    return rels
+
+
+def _read_style_table(package: zipfile.ZipFile, styles_part: str) -> "StyleTable":
+    try:
+        return StyleTable(etree.fromstring(package.read(styles_part)))
+    except KeyError:
+        return StyleTable()
+
+
+def _document_style_table(document) -> Optional["StyleTable"]:
+    # Таблица стилей документа python-docx; None для объектов без XML стилей
+    try:
+        element = document.styles.element
+    except AttributeError:
+        return None
+    if not isinstance(element, etree._Element):
+        return None
+    return StyleTable(element)
+
+
+@dataclass(slots=True)
+class StyleInfo:
+    # Стиль с учётом всей цепочки basedOn
+    name: str
+    heading_level: Optional[int]
+    font_name: Optional[str]
+    size_pt: Optional[float]
+
+
+class StyleTable:
+    # Стили документа по идентификатору. Строится один раз на документ:
+    # каждый стиль разрешается по цепочке basedOn при первом обращении,
+    # дальше проверки получают имя, уровень заголовка, шрифт и размер за O(1).
+
+    def __init__(self, styles_element=None):
+        # styles_element: корень styles.xml (w:styles); без него все стили пустые
+        self._raw = {}
+        self._resolved = {}
+        self._paragraph_styles = {}
+        default_id = None
+        default_font = default_size = None
+
+        if styles_element is not None:
+            default_font, default_size = _rpr_font(
+                styles_element.find(f"{_W}docDefaults/{_W}rPrDefault/{_W}rPr"))
+            for style in styles_element.iter(f"{_W}style"):
+                kind = style.get(f"{_W}type")
+                if kind not in ("paragraph", "character"):
+                    continue
+                style_id = style.get(f"{_W}styleId")
+                name_element = style.find(f"{_W}name")
+                style_name = name_element.get(f"{_W}val") if name_element is not None else ""
+                based_on = style.find(f"{_W}basedOn")
+                outline = style.find(f"{_W}pPr/{_W}outlineLvl")
+                self._raw[kind, style_id] = (
+                    _UI_STYLE_NAMES.get(style_name, style_name),
+                    based_on.get(f"{_W}val") if based_on is not None else None,
+                    *_rpr_font(style.find(f"{_W}rPr")),
+                    _int_attr(outline),
+                )
+                if kind == "paragraph" and style.get(f"{_W}default") in ("1", "true", "on"):
+                    default_id = style_id
+
+        self._default_font = default_font
+        self._default_size = default_size
+        self._default_id = default_id
+
+    def paragraph_style(self, style_id: Optional[str]) -> StyleInfo:
+        # Стиль абзаца; неизвестный идентификатор или None — стиль по умолчанию
+        if ("paragraph", style_id) not in self._raw:
+            style_id = self._default_id
+        info = self._paragraph_styles.get(style_id)
+        if info is None:
+            name, font, size, outline = self._resolve("paragraph", style_id)
+            level = _heading_level(name)
+            if level is None and outline is not None and outline < 9:
+                level = outline + 1  # w:outlineLvl считается с нуля, 9 — основной текст
+            info = StyleInfo(
+                name=name,
+                heading_level=level,
+                font_name=font or self._default_font,
+                size_pt=size or self._default_size
+            )
+            self._paragraph_styles[style_id] = info
+        return info
+
+    def run_font(self, paragraph_style: StyleInfo, style_id: Optional[str]) -> Tuple[Optional[str], Optional[float]]:
+        # Шрифт и размер фрагмента без прямого форматирования:
+        # стиль знаков, затем стиль абзаца (уже с учётом docDefaults)
+        _, font, size, _ = self._resolve("character", style_id)
+        return font or paragraph_style.font_name, size or paragraph_style.size_pt
+
+    def _resolve(self, kind: str, style_id: Optional[str]) -> tuple:
+        # (имя, шрифт, размер, outlineLvl) с наследованием по basedOn
+        key = (kind, style_id)
+        if key in self._resolved:
+            return self._resolved[key]
+
+        raw = self._raw.get(key)
+        if raw is None:
+            return "", None, None, None
+
+        self._resolved[key] = (raw[0], raw[2], raw[3], raw[4])  # Защита от циклов basedOn
+        name, based_on, font, size, outline = raw
+        if based_on is not None:
+            _, base_font, base_size, base_outline = self._resolve(kind, based_on)
+            font = font or base_font
+            size = size or base_size
+            outline = outline if outline is not None else base_outline
+        self._resolved[key] = (name, font, size, outline)
+        return self._resolved[key]
+
+
+def _rpr_font(rpr) -> Tuple[Optional[str], Optional[float]]:
+    # Шрифт (w:rFonts/@w:ascii) и размер в пунктах (w:sz) из w:rPr
+    if rpr is None:
+        return None, None
+    fonts = rpr.find(f"{_W}rFonts")
+    font_name = fonts.get(f"{_W}ascii") if fonts is not None else None
+    size = _int_attr(rpr.find(f"{_W}sz"))
+    return font_name, size / 2 if size is not None else None  # Размер задан в полупунктах
+
+
+def _int_attr(element) -> Optional[int]:
+    # Целое значение w:val элемента или None
+    if element is None:
+        return None
+    try:
+        return int(element.get(f"{_W}val"))
+    except (TypeError, ValueError):
+        return None
+
+
+def _snapshot_block(block: Block, styles: "StyleTable", profile: Optional[CheckProfile] = None) -> ParagraphSnapshot:
+    if profile is not None:
+        profile.xml_nodes += sum(1 for _ in block.element.iter())
+    return _snapshot_paragraph_xml(block.index, block.element, styles, block.area, block.location)
+
+
+def _snapshot_paragraph_xml(index: int, p, styles: StyleTable, area: str = "body",
+                            location: Optional[str] = None) -> ParagraphSnapshot:
+    # Снимок абзаца прямо из элемента w:p; шрифты и размеры фрагментов
+    # без прямого форматирования берутся из таблицы стилей
+    style_id = None
+    alignment = None
+    ppr = p.find(f"{_W}pPr")
+    if ppr is not None:
+        pstyle = ppr.find(f"{_W}pStyle")
+        if pstyle is not None:
+            style_id = pstyle.get(f"{_W}val")
+        jc = ppr.find(f"{_W}jc")
+        if jc is not None:
+            alignment = _ALIGNMENTS.get(jc.get(f"{_W}val"))
+    style = styles.paragraph_style(style_id)
+
+    texts = []
+    runs = []
+    for child in p:
+        if child.tag == f"{_W}r":
+            run = _snapshot_run_xml(child, style, styles)
+            runs.append(run)
+            texts.append(run.text)
+        elif child.tag == f"{_W}hyperlink":
+            texts.extend(_run_text_xml(r) for r in child.iterchildren(f"{_W}r"))
+
+    return ParagraphSnapshot(
+        index=index,
+        text="".join(texts),
+        style_name=style.name,
+        alignment=alignment,
+        runs=runs,
+        heading_level=style.heading_level,
+        area=area,
+        location=location
+    )
+
+
+def _snapshot_run_xml(r, paragraph_style: StyleInfo, styles: StyleTable) -> RunSnapshot:
+    rpr = r.find(f"{_W}rPr")
+    font_name, size_pt = _rpr_font(rpr)
+    if font_name is None or size_pt is None:
+        rstyle = rpr.find(f"{_W}rStyle") if rpr is not None else None
+        style_font, style_size = styles.run_font(
+            paragraph_style, rstyle.get(f"{_W}val") if rstyle is not None else None)
+        font_name = font_name or style_font
+        size_pt = size_pt or style_size
+    return RunSnapshot(text=_run_text_xml(r), font_name=font_name, size_pt=size_pt)
+
+
+def _run_text_xml(r) -> str:
+    # Текст фрагмента по тем же правилам, что Run.text в python-docx
+    parts = []
+    for child in r:
+        tag = child.tag
+        if tag == f"{_W}t":
+            parts.append(child.text or "")
+        elif tag in (f"{_W}tab", f"{_W}ptab"):
+            parts.append("\t")
+        elif tag == f"{_W}cr":
+            parts.append("\n")
+        elif tag == f"{_W}br":
+            if child.get(f"{_W}type") in (None, "textWrapping"):
+                parts.append("\n")
+        elif tag == f"{_W}noBreakHyphen":
+            parts.append("-")
+    return "".join(parts)
+
+
+def _snapshot_paragraph(index: int, paragraph) -> ParagraphSnapshot:
+    # Снимок абзаца без доступа к XML (объекты-заглушки в тестах)
+    style_name = _style_name(paragraph)
+    return ParagraphSnapshot(
+        index=index,
+        text=paragraph.text,
+        style_name=style_name,
+        alignment=_alignment(paragraph),
+        runs=_snapshot_runs(paragraph),
+        heading_level=_heading_level(style_name)
+    )
+
+
+def _style_name(paragraph) -> str:
+    style = getattr(paragraph, 'style', None)
+    name = getattr(style, 'name', None)
+    return name if isinstance(name, str) else ""
+
+
+def _alignment(paragraph) -> Optional[int]:
+    alignment = getattr(paragraph, 'alignment', None)
+    if alignment is None:
+        return None
+    try:
+        return int(alignment)
+    except (TypeError, ValueError):
+        return None
+
+
+def _heading_level(style_name: str) -> Optional[int]:
+    if not style_name.startswith('Heading'):
+        return None
+    try:
+        return int(style_name.split()[-1])
+    except (ValueError, IndexError):
+        return None
+
+
+def _snapshot_runs(paragraph) -> List[RunSnapshot]:
+    try:
+        runs = list(paragraph.runs)
+    except (AttributeError, TypeError):
+        return []
+
+    snapshots = []
+    for run in runs:
+        font = getattr(run, 'font', None)
+        font_name = getattr(font, 'name', None) if font is not None else None
+        snapshots.append(RunSnapshot(
+            text=run.text,
+            font_name=font_name or None,
+            size_pt=_run_size_pt(font)
+        ))
+    return snapshots
+
+
+def _run_size_pt(font) -> Optional[float]:
+    if font is None or not getattr(font, 'size', None):
+        return None
+    try:
+        # Конвертируем в пункты (1 point = 12700)
+        if hasattr(font.size, 'pt'):
+            return font.size.pt
+        return font.size / 12700
+    except (AttributeError, TypeError):
+        return None
+
+
+class _Checker:
+    # Посетитель снимка: visit() вызывается для каждого абзаца по порядку,
+    # finish() возвращает найденные ошибки
+    # local=True — ошибки правил rules зависят только от самого абзаца,
+    # поэтому после правки их можно перепроверить только в изменённых абзацах
+    # mergeable=True — документ можно проверить по частям в разных процессах:
+    # state() возвращает результат части, merge() добавляет его к результату
+    # предыдущих частей (см. _run_checks_parallel)
+    local = False
+    mergeable = False
+    rules: Tuple[str, ...] = ()
+
+    def __init__(self):
+        self.errors = []
+
+    def begin(self, snapshot: DocumentSnapshot):
+        # Вызывается один раз перед обходом, когда нужен весь документ сразу.
+        # В экономном режиме (run_checks(low_memory=True)) снимка нет
+        # и begin не вызывается: проверка должна работать и без него.
+        pass
+
+    def visit(self, paragraph: ParagraphSnapshot):
+        pass
+
+    def finish(self) -> List[Finding]:
+        return self.errors
+
+    def state(self):
+        return self.errors
+
+    def merge(self, state):
+        self.errors.extend(state)
+
+
+def _run_checkers(document, checkers: List[_Checker], progress=None, cancel=None, stage: str = "",
+                  profile: Optional[CheckProfile] = None) -> List[Finding]:
+    # Один проход по снимку для всех переданных проверок сразу
+    snapshot = scan_document(document, progress, cancel, profile)
+    if profile is not None:
+        return _run_checkers_profiled(snapshot, checkers, progress, cancel, stage, profile)
+
+    for checker in checkers:
+        checker.begin(snapshot)
+
+    total = len(snapshot.paragraphs)
+    for i, paragraph in enumerate(snapshot.paragraphs):
+        for checker in checkers:
+            checker.visit(paragraph)
+        if (i + 1) % PROGRESS_STEP == 0:
+            _report_progress(stage, i + 1, total, progress, cancel)
+
+    errors = []
+    for checker in checkers:
+        errors.extend(checker.finish())
+    return errors
+
+
+def _run_checkers_profiled(snapshot: DocumentSnapshot, checkers: List[_Checker], progress, cancel,
+                           stage: str, profile: CheckProfile) -> List[Finding]:
+    # То же, что _run_checkers, но с замером времени каждой проверки.
+    # Отдельная функция, чтобы без профилирования не платить за замеры.
+    lemmas_before = lemma_cache_info()
+    timings = [0.0] * len(checkers)
+    for n, checker in enumerate(checkers):
+        started = time.perf_counter()
+        checker.begin(snapshot)
+        timings[n] += time.perf_counter() - started
+
+    total = len(snapshot.paragraphs)
+    for i, paragraph in enumerate(snapshot.paragraphs):
+        for n, checker in enumerate(checkers):
+            started = time.perf_counter()
+            checker.visit(paragraph)
+            timings[n] += time.perf_counter() - started
+        if (i + 1) % PROGRESS_STEP == 0:
+            _report_progress(stage, i + 1, total, progress, cancel)
+
+    errors = []
+    for n, checker in enumerate(checkers):
+        started = time.perf_counter()
+        errors.extend(checker.finish())
+        name = type(checker).__name__.lstrip("_")
+        profile.checkers[name] = profile.checkers.get(name, 0.0) + timings[n] + time.perf_counter() - started
+
+    lemmas_after = lemma_cache_info()
+    profile.lemma_hits += lemmas_after.hits - lemmas_before.hits
+    profile.lemma_misses += lemmas_after.misses - lemmas_before.misses
+    return errors
+
+
+# Категории проверки в порядке вывода ошибок
+CHECK_CATEGORIES = ("терминология", "структура", "нумерация")
+
+
+def _category_checkers(category: str, doc_type: str, term_memo=None,
+                       memo_limit: Optional[int] = None) -> List[_Checker]:
+    if category == "терминология":
+        return [_TerminologyChecker(term_memo, memo_limit)]
+    if category == "структура":
+        return _structure_checkers(doc_type)
+    if category == "нумерация":
+        return [_NumberingChecker()]
+    return []
+
+
+# Сколько текстов абзацев запоминает проверка терминологии в экономном режиме
+STREAM_MEMO_LIMIT = 10000
+
+
+# Документы короче этого проверяются в одном процессе даже при jobs > 1:
+# запуск частей в пуле процессов дороже самой проверки
+PARALLEL_MIN_PARAGRAPHS = 2000
+
+# Как часто (в секундах) проверять отмену, пока части проверяются в пуле
+_CHUNK_POLL_SECONDS = 0.1
+
+
+def run_checks(document, doc_type: str, rules, progress=None, cancel=None, on_result=None,
+               term_memo=None, profile: Optional[CheckProfile] = None,
+               low_memory: bool = False, memory_budget: Optional[float] = None,
+               jobs: int = 1) -> List[Finding]:
+    # Выполняет выбранные категории проверок.
+    # Документ читается один раз, затем каждая категория проходит по готовому
+    # снимку; on_result(категория, ошибки) вызывается сразу после её завершения.
+    # term_memo — результаты проверки терминологии по тексту абзаца (см. _TerminologyChecker).
+    # profile — CheckProfile, который заполняется замерами (по умолчанию замеров нет).
+    # low_memory=True — экономный режим (см. _run_checks_streaming);
+    # memory_budget — бюджет памяти процесса в МБ для экономного режима.
+    # jobs > 1 — большой документ проверяется по частям в пуле процессов
+    # (см. _run_checks_parallel), результат тот же, что при jobs=1.
+    if low_memory or memory_budget is not None:
+        return _run_checks_streaming(document, doc_type, rules, progress, cancel, on_result,
+                                     term_memo, profile, memory_budget)
+
+    snapshot = scan_document(document, progress, cancel, profile)
+    if jobs > 1 and len(snapshot.paragraphs) >= PARALLEL_MIN_PARAGRAPHS:
+        return _run_checks_parallel(snapshot, doc_type, rules, progress, cancel, on_result,
+                                    term_memo, profile, jobs)
+    errors = []
+    for category in CHECK_CATEGORIES:
+        if category not in rules:
+            continue
+        checkers = _category_checkers(category, doc_type, term_memo)
+        found = _run_checkers(snapshot, checkers, progress, cancel, category, profile)
+        errors.extend(found)
+        if on_result is not None:
+            on_result(category, found)
+    if profile is not None:
+        profile.peak_rss_mb = peak_memory_mb()
+    return errors
+
+
+# Пул процессов для проверки частей документа (создаётся при первом обращении)
+_chunk_pool = None
+_chunk_pool_jobs = 0
+_chunk_pool_lock = threading.Lock()
+
+
+def _get_chunk_pool(jobs: int) -> ProcessPoolExecutor:
+    # Пул сохраняется между проверками: процессы не создаются заново
+    # и один раз загружают морфологический анализатор.
+    # Процессы запускаются через spawn, а не fork: пул создаётся из рабочего
+    # потока приложения, и fork унаследовал бы блокировки, захваченные другими
+    # потоками (например, _morph_lock во время прогрева анализатора)
+    global _chunk_pool, _chunk_pool_jobs
+    with _chunk_pool_lock:
+        if _chunk_pool is None or _chunk_pool_jobs != jobs:
+            if _chunk_pool is not None:
+                _chunk_pool.shutdown(wait=False)
+            _chunk_pool = ProcessPoolExecutor(max_workers=jobs,
+                                              mp_context=multiprocessing.get_context("spawn"))
+            _chunk_pool_jobs = jobs
+        return _chunk_pool
+
+
+def _check_chunk(doc_type: str, categories: List[str], paragraphs: List[ParagraphSnapshot],
+                 term_memo: Optional[dict] = None) -> list:
+    # Выполняется в процессе пула: проверки mergeable по одной части документа.
+    # Возвращает state() проверок в том же порядке, что _category_checkers.
+    checkers = [checker for category in categories
+                for checker in _category_checkers(category, doc_type, term_memo) if checker.mergeable]
+    chunk = DocumentSnapshot(paragraphs)
+    for checker in checkers:
+        checker.begin(chunk)
+    for paragraph in paragraphs:
+        for checker in checkers:
+            checker.visit(paragraph)
+    return [checker.state() for checker in checkers]
+
+
+def _run_checks_parallel(snapshot: DocumentSnapshot, doc_type: str, rules, progress, cancel, on_result,
+                         term_memo, profile: Optional[CheckProfile], jobs: int) -> List[Finding]:
+    # Снимок делится на jobs частей подряд идущих абзацев. Проверки mergeable
+    # выполняются по частям в пуле процессов, их результаты объединяются
+    # в порядке частей, поэтому ошибки и их порядок совпадают с run_checks
+    # в одном процессе. Остальные проверки (реквизиты, соседние заголовки,
+    # дата) дёшевы и выполняются здесь же по всему снимку, пока работают части.
+    # В профиль попадает общее время проверки частей.
+    started = time.perf_counter()
+    categories = [category for category in CHECK_CATEGORIES if category in rules]
+    groups = [(category, _category_checkers(category, doc_type, term_memo)) for category in categories]
+    checkers = [checker for _, group in groups for checker in group]
+    mergeable = [checker for checker in checkers if checker.mergeable]
+    serial = [checker for checker in checkers if not checker.mergeable]
+
+    paragraphs = snapshot.paragraphs
+    size = -(-len(paragraphs) // jobs)
+    chunks = [paragraphs[i:i + size] for i in range(0, len(paragraphs), size)]
+    pool = _get_chunk_pool(jobs)
+    futures = []
+    for chunk in chunks:
+        memo = None
+        if term_memo:
+            memo = {p.text: term_memo[p.text] for p in chunk if p.text in term_memo}
+        futures.append(pool.submit(_check_chunk, doc_type, categories, chunk, memo))
+
+    try:
+        for checker in serial:
+            checker.begin(snapshot)
+        for paragraph in paragraphs:
+            for checker in serial:
+                checker.visit(paragraph)
+
+        done = 0
+        for future, chunk in zip(futures, chunks):
+            while True:
+                try:
+                    states = future.result(timeout=_CHUNK_POLL_SECONDS)
+                    break
+                except FutureTimeoutError:
+                    _report_progress("проверка", done, len(paragraphs), progress, cancel)
+            for checker, state in zip(mergeable, states):
+                checker.merge(state)
+            done += len(chunk)
+            _report_progress("проверка", done, len(paragraphs), progress, cancel)
+    finally:
+        for future in futures:
+            future.cancel()
+
+    errors = []
+    for category, group in groups:
+        found = []
+        for checker in group:
+            found.extend(checker.finish())
+        errors.extend(found)
+        if on_result is not None:
+            on_result(category, found)
+
+    if profile is not None:
+        profile.checkers["ParallelChunks"] = (profile.checkers.get("ParallelChunks", 0.0)
+                                              + time.perf_counter() - started)
+        profile.peak_rss_mb = peak_memory_mb()
+    return errors
+
+
+def _run_checks_streaming(document, doc_type: str, rules, progress, cancel, on_result, term_memo,
+                          profile: Optional[CheckProfile], memory_budget: Optional[float]) -> List[Finding]:
+    # Экономный режим run_checks для очень больших документов: снимок не строится,
+    # абзацы из потокового чтения сразу передаются всем проверкам всех категорий
+    # и больше нигде не хранятся. Результат тот же, что у обычного режима,
+    # но on_result вызывается только после прохода по всему документу.
+    # Каждые PROGRESS_STEP абзацев память процесса сверяется с memory_budget.
+    groups = [(category, _category_checkers(category, doc_type, term_memo, STREAM_MEMO_LIMIT))
+              for category in CHECK_CATEGORIES if category in rules]
+    checkers = [checker for _, group in groups for checker in group]
+
+    started = time.perf_counter()
+    lemmas_before = lemma_cache_info()
+    timings = [0.0] * len(checkers)
+    source, total = _paragraph_source(document, profile)
+    count = 0
+    for paragraph in source:
+        if profile is None:
+            for checker in checkers:
+                checker.visit(paragraph)
+        else:
+            profile.words += len(_WORD_RE.findall(paragraph.text))
+            for n, checker in enumerate(checkers):
+                checker_started = time.perf_counter()
+                checker.visit(paragraph)
+                timings[n] += time.perf_counter() - checker_started
+
+        count += 1
+        if count % PROGRESS_STEP == 0:
+            _report_progress("проверка", count, total, progress, cancel)
+            _check_memory_budget(memory_budget)
+    _report_progress("проверка", count, total or count, progress, cancel)
+    _check_memory_budget(memory_budget)
+
+    errors = []
+    finished = iter(range(len(checkers)))
+    for category, group in groups:
+        found = []
+        for checker in group:
+            n = next(finished)
+            checker_started = time.perf_counter()
+            found.extend(checker.finish())
+            timings[n] += time.perf_counter() - checker_started
+        errors.extend(found)
+        if on_result is not None:
+            on_result(category, found)
+
+    if profile is not None:
+        for checker, seconds in zip(checkers, timings):
+            name = type(checker).__name__.lstrip("_")
+            profile.checkers[name] = profile.checkers.get(name, 0.0) + seconds
+        # Чтение и проверки идут вперемешку: чтением считается всё, кроме проверок
+        profile.scan_seconds += time.perf_counter() - started - sum(timings)
+        profile.paragraphs += count
+        lemmas_after = lemma_cache_info()
+        profile.lemma_hits += lemmas_after.hits - lemmas_before.hits
+        profile.lemma_misses += lemmas_after.misses - lemmas_before.misses
+        profile.peak_rss_mb = peak_memory_mb()
+    return errors
+
+
+def recheck_changed(document, findings: List[Finding], changed, doc_type: str, rules) -> List[Finding]:
+    # Обновляет результаты run_checks после правки документа (например, auto_fix_terminology).
+    # changed — ключи (location, index) изменённых абзацев. Проверки, зависящие
+    # только от абзаца (local), заново выполняются лишь для изменённых абзацев,
+    # их остальные ошибки берутся из findings; проверки всего документа
+    # (реквизиты, шрифты, соседние заголовки, нумерация) выполняются полностью —
+    # они не используют морфологию и дёшевы. Порядок ошибок как у run_checks.
+    snapshot = scan_document(document)
+    changed = set(changed)
+    positions = {(p.location, p.index): i for i, p in enumerate(snapshot.paragraphs)}
+    edited = DocumentSnapshot([p for p in snapshot.paragraphs if (p.location, p.index) in changed])
+
+    errors = []
+    for category in CHECK_CATEGORIES:
+        if category not in rules:
+            continue
+        checkers = _category_checkers(category, doc_type)
+        # Проверки всего документа — одним проходом по снимку
+        whole = [checker for checker in checkers if not checker.local]
+        for checker in whole:
+            checker.begin(snapshot)
+        for paragraph in snapshot.paragraphs:
+            for checker in whole:
+                checker.visit(paragraph)
+        whole_found = {id(checker): checker.finish() for checker in whole}
+
+        for checker in checkers:
+            if not checker.local:
+                errors.extend(whole_found[id(checker)])
                 continue
+            kept = [f for f in findings
+                    if f.rule in checker.rules and (f.location, f.paragraph) not in changed]
+            merged = kept + _run_checkers(edited, [checker])
+            merged.sort(key=lambda f: positions.get((f.location, f.paragraph), len(positions)))
+            errors.extend(merged)
     return errors
 
 
-def auto_fix_terminology(document):
-    # Автоматически заменяет запрещенные слова на корректные аналоги
+def resolved_findings(before: List[Finding], after: List[Finding]) -> List[Finding]:
+    # Ошибки из before, которых больше нет в after. Позиция внутри абзаца
+    # не учитывается: после замены в абзаце она сдвигается у оставшихся ошибок.
+    remaining = Counter((f.rule, f.location, f.paragraph, f.lemma, f.text) for f in after)
+    resolved = []
+    for finding in before:
+        key = (finding.rule, finding.location, finding.paragraph, finding.lemma, finding.text)
+        if remaining[key]:
+            remaining[key] -= 1
+        else:
+            resolved.append(finding)
+    return resolved
+
+
+# Знаки, которые отбрасываются по краям слова
+_WORD_PUNCTUATION = ".,;:!?\"'()[]{}—–-"
+
+# Слово — любая последовательность непробельных символов
+_WORD_RE = re.compile(r'\S+')
+
+
+@dataclass(slots=True)
+class TextTokens:
+    # Слова одного текста: позиции и номера в словаре документа (Vocabulary)
+    starts: array     # Начало слова в тексте
+    ends: array       # Конец слова в тексте
+    ids: array        # Номер формы слова в словаре
+
+
+class Vocabulary:
+    # Словарь уникальных форм слов документа. Тексты разбиваются на слова
+    # одним проходом регулярного выражения по всему документу, каждая
+    # уникальная форма очищается и лемматизируется один раз, а тексты
+    # хранят только массивы номеров форм. Общий для проверки и исправления.
+    # forms — таблица словоформ словаря (Lexicon.forms): если она есть,
+    # лемма ищется в ней, а морфологический анализатор не используется;
+    # у слов не из таблицы леммы нет — в словаре их всё равно нет.
+
+    def __init__(self, forms: Optional[Dict[str, str]] = None):
+        self.forms = forms
+        self.ids = {}        # Форма слова -> номер
+        self.cleans = []     # Номер -> слово без пунктуации по краям
+        self.lemmas = []     # Номер -> лемма (None для слов не из букв)
+
+    def tokenize(self, texts) -> Dict[str, TextTokens]:
+        # Разбивает тексты на слова: {текст: TextTokens}. Одинаковые тексты
+        # разбираются один раз. Слово (\S+) не содержит перевода строки,
+        # поэтому тексты разбираются вместе, склеенные через "\n".
+        unique = list(dict.fromkeys(text for text in texts if text.strip()))
+        result = {text: TextTokens(array('i'), array('i'), array('i')) for text in unique}
+        if not unique:
+            return result
+
+        bounds = []
+        offset = 0
+        for text in unique:
+            bounds.append(offset + len(text))
+            offset += len(text) + 1
+
+        ids = self.ids
+        current = 0
+        base = 0
+        tokens = result[unique[0]]
+        for match in _WORD_RE.finditer("\n".join(unique)):
+            start = match.start()
+            while start >= bounds[current]:
+                base = bounds[current] + 1
+                current += 1
+                tokens = result[unique[current]]
+
+            word = match.group()
+            word_id = ids.get(word)
+            if word_id is None:
+                word_id = self._add(word)
+            tokens.starts.append(start - base)
+            tokens.ends.append(match.end() - base)
+            tokens.ids.append(word_id)
+        return result
+
+    def _add(self, word: str) -> int:
+        clean = word.strip(_WORD_PUNCTUATION)
+        lemma = None
+        if clean and clean.isalpha():
+            if self.forms is not None:
+                lemma = self.forms.get(clean.lower())
+            else:
+                try:
+                    lemma = _lemmatize(clean.lower())
+                except Exception:
+                    lemma = None
+        word_id = len(self.cleans)
+        self.ids[word] = word_id
+        self.cleans.append(clean)
+        self.lemmas.append(lemma)
+        return word_id
+
+
+def _find_terms(text: str, tokens: TextTokens, vocabulary: Vocabulary, matcher):
+    # Слова и фразы словаря в тексте абзаца. Для каждого совпадения возвращает
+    # начало первого и конец последнего слова, позицию фразы без пунктуации
+    # по краям, найденный текст, запись словаря и связанное с ней значение.
+    cleans = vocabulary.cleans
+    lemmas = vocabulary.lemmas
+    ids = tokens.ids
+
+    for start, end, phrase, value in matcher.find([lemmas[i] for i in ids]):
+        first_clean, last_clean = cleans[ids[start]], cleans[ids[end - 1]]
+        first_start, last_start = tokens.starts[start], tokens.starts[end - 1]
+        span_start = text.index(first_clean, first_start)
+        span_end = text.index(last_clean, last_start) + len(last_clean)
+        found = " ".join(cleans[i] for i in ids[start:end])
+        yield first_start, tokens.ends[end - 1], (span_start, span_end), found, phrase, value
+
+
+class _TerminologyChecker(_Checker):
+    local = True
+    mergeable = True
+    rules = ("terminology.forbidden",)
+
+    def __init__(self, memo: Optional[dict] = None, memo_limit: Optional[int] = None):
+        super().__init__()
+        # Результаты по тексту абзаца: {текст: нарушения без номера абзаца}.
+        # Заполняется из кэша результатов и пополняется новыми абзацами,
+        # одинаковые абзацы повторно не разбираются. memo_limit ограничивает
+        # число запоминаемых текстов (экономный режим).
+        self.memo = memo if memo is not None else {}
+        self.memo_limit = memo_limit
+        # Словари берутся на момент проверки: изменённый файл словаря
+        # подхватывается без перезапуска
+        lexicon = current_lexicon()
+        self.matcher = lexicon.forbidden
+        self.vocabulary = Vocabulary(lexicon.forms)
+        self.tokens = {}
+
+    def begin(self, snapshot):
+        # Все ещё не разобранные тексты документа разбиваются на слова за один проход
+        self.tokens = self.vocabulary.tokenize(
+            p.text for p in snapshot.paragraphs if p.text not in self.memo)
+
+    def visit(self, paragraph):
+        text = paragraph.text
+        if not text.strip():
+            return
+
+        found_in_text = self.memo.get(text)
+        if found_in_text is None:
+            tokens = self.tokens.get(text) or self.vocabulary.tokenize([text])[text]
+            found_in_text = [
+                Finding("terminology.forbidden", "error",
+                        span=span, text=found, lemma=phrase, suggestion=suggestion)
+                for _, _, span, found, phrase, suggestion
+                in _find_terms(text, tokens, self.vocabulary, self.matcher)
+            ]
+            if self.memo_limit is None or len(self.memo) < self.memo_limit:
+                self.memo[text] = found_in_text
+
+        for finding in found_in_text:
+            self.errors.append(replace(finding, paragraph=paragraph.index, location=paragraph.location))
+
+    def state(self):
+        # Вместе с ошибками возвращаются разобранные тексты, чтобы их сохранил кэш результатов
+        return self.errors, self.memo
+
+    def merge(self, state):
+        errors, memo = state
+        self.errors.extend(errors)
+        self.memo.update(memo)
+
+
+def check_terminology(document) -> List[Finding]:
+    # Проверяет документ на наличие запрещённых слов и выражений.
+    return _run_checkers(document, [_TerminologyChecker()])
+
+
+def auto_fix_terminology(document, changed: Optional[set] = None):
+    # Автоматически заменяет запрещенные слова и выражения на корректные аналоги.
+    # Правятся только элементы текста (w:t) фрагментов (runs), в которых есть
+    # совпадения: жирность, курсив, шрифт и размер, а также ссылки на сноски,
+    # рисунки и поля внутри фрагментов сохраняются, остальные абзацы не затрагиваются.
+    # Исправляются все абзацы документа, включая таблицы, колонтитулы и сноски.
+    # В changed добавляются ключи (location, index) изменённых абзацев (см. recheck_changed).
     # Возвращает количество выполненных замен
+    from docx.text.paragraph import Paragraph
+
+    # Сначала тексты всех абзацев разбиваются на слова одним проходом
+    # (общий словарь форм), затем правки вносятся по абзацам
+    blocks = []
+    for block in iter_blocks(document):
+        elements = [element for run in Paragraph(block.element, None).runs
+                    for element in run._r.xpath(_RUN_TEXT_XPATH)]
+        blocks.append((block, elements, [str(element) for element in elements]))
+
+    lexicon = current_lexicon()
+    vocabulary = Vocabulary(lexicon.forms)
+    tokens = vocabulary.tokenize("".join(texts) for _, _, texts in blocks)
+
     replacements_count = 0
+    raw_parts = {}
+    for block, elements, texts in blocks:
+        text = "".join(texts)
+        edits = _terminology_edits(text, tokens.get(text), vocabulary, lexicon)
+        if not edits:
+            continue
 
-    for paragraph in document.paragraphs:
-        if not paragraph.text.strip():
+        editable = [element.tag == _W + "t" for element in elements]
+        new_texts, applied = _apply_edits_to_runs(texts, edits, editable)
+        if not applied:
             continue
 
-        # Разбиваем абзац на слова и обрабатываем каждое
-        original_text = paragraph.text
-        words = original_text.split()
-        new_words = []
+        replacements_count += applied
+        for index, new_text in new_texts.items():
+            _set_text_element(elements[index], new_text)
+        if changed is not None:
+            changed.add((block.location, block.index))
+        if block.raw_part is not None:
+            raw_parts[id(block.raw_part)] = block
+
+    # Части, которые python-docx хранит байтами (сноски), записываются обратно
+    for block in raw_parts.values():
+        root = block.element.getroottree().getroot()
+        block.raw_part._blob = etree.tostring(root, xml_declaration=True, encoding="UTF-8", standalone=True)
+
+    return replacements_count
 
-        for word in words:
-            clean_word = word.strip(".,;:!?\"'()[]{}—–-")
 
-            if not clean_word or not clean_word.isalpha():
-                new_words.append(word)
+def _terminology_edits(text: str, tokens: Optional[TextTokens] = None,
+                       vocabulary: Optional[Vocabulary] = None,
+                       lexicon: Optional[Lexicon] = None) -> List[Tuple[int, int, str]]:
+    # Находит замены в тексте абзаца: список (начало, конец, новый текст)
+    if not text.strip():
+        return []
+    if lexicon is None:
+        lexicon = current_lexicon()
+    if tokens is None:
+        vocabulary = Vocabulary(lexicon.forms)
+        tokens = vocabulary.tokenize([text])[text]
+
+    edits = []
+    for first_start, last_end, span, found, phrase, replacement in _find_terms(text, tokens, vocabulary,
+                                                                               lexicon.replacements):
+        if not replacement:
+            # Если замена пустая - удаляем слова вместе с пробелом после них
+            span_start, span_end = first_start, last_end
+            while span_end < len(text) and text[span_end].isspace():
+                span_end += 1
+            if span_end == len(text):
+                while span_start > 0 and text[span_start - 1].isspace():
+                    span_start -= 1
+            edits.append((span_start, span_end, ""))
+            continue
+
+        # Замена ставится в падеж, число и род исправляемого слова. Слово
+        # в словарной форме не склоняется: по нему самому форму не определить
+        # («такой» — и именительный, и творительный падеж). Глагол, для которого
+        # у замены нет формы того же времени, не исправляется: ошибка остаётся
+        inflections = _lexicon_inflections(lexicon)
+        if replacement in inflections and found.lower().replace("ё", "е") != phrase.replace("ё", "е"):
+            replacement = inflect_replacement(inflections[replacement], _source_grammemes(found, lexicon))
+            if replacement is None:
                 continue
 
-            try:
-                normal_form = _morph.parse(clean_word.lower())[0].normal_form
-
-                if normal_form in TERMINOLOGY_REPLACEMENTS:
-                    replacement = TERMINOLOGY_REPLACEMENTS[normal_form]
-
-                    if replacement:  # Если замена не пустая
-                        # Сохраняем оригинальное форматирование (регистр)
-                        if clean_word.istitle():
-                            replacement = replacement.title()
-                        elif clean_word.isupper():
-                            replacement = replacement.upper()
-
-                        # Заменяем слово в оригинальном тексте с сохранением знаков препинания
-                        new_word = word.replace(clean_word, replacement)
-                        new_words.append(new_word)
-                        replacements_count += 1
-                    else:
-                        # Если замена пустая - удаляем слово
-                        replacements_count += 1
-                        continue
-                else:
-                    new_words.append(word)
+        # Сохраняем оригинальное форматирование (регистр)
+        clean_word = found.split(' ', 1)[0]
+        if clean_word.isupper() and len(clean_word) > 1:
+            replacement = replacement.upper()
+        elif clean_word[:1].isupper():
+            replacement = replacement[:1].upper() + replacement[1:]
 
+        # Заменяем слова, оставляя знаки препинания по краям фразы
+        edits.append((span[0], span[1], replacement))
+
+    return edits
+
+
+def _lexicon_inflections(lexicon: Lexicon) -> dict:
+    # Парадигмы замен: из файла словаря или построенные один раз для встроенных словарей
+    if lexicon.inflections is not None:
+        return lexicon.inflections
+    return lexicon_inflections(lexicon, get_morph())
+
+
+@lru_cache(maxsize=LEMMA_CACHE_SIZE)
+def _word_grammemes(word: str) -> tuple:
+    return grammemes(get_morph().parse(word)[0].tag)
+
+
+def _source_grammemes(found: str, lexicon: Lexicon) -> Optional[tuple]:
+    # Граммемы исправляемого слова; во фразе — первого слова с падежом.
+    # Для словаря с таблицей словоформ анализатор не нужен.
+    case = INFLECT_CATEGORIES.index("case")
+    result = None
+    for word in found.lower().split():
+        tag = lexicon.tags.get(word) if lexicon.tags is not None else None
+        if tag is None:
+            try:
+                tag = _word_grammemes(word)
             except Exception:
-                new_words.append(word)
+                continue
+        if result is None:
+            result = tag
+        if tag[case] is not None:
+            return tag
+    return result
+
+
+# Элементы фрагмента (run), из которых python-docx собирает его текст
+_RUN_TEXT_XPATH = "w:br | w:cr | w:noBreakHyphen | w:ptab | w:t | w:tab"
+
+
+def _set_text_element(element, text: str):
+    # Меняет текст элемента w:t, не трогая соседние элементы фрагмента
+    element.text = text
+    if text != text.strip():
+        element.set("{http://www.w3.org/XML/1998/namespace}space", "preserve")
+
+
+def _apply_edits_to_runs(texts: List[str], edits: List[Tuple[int, int, str]],
+                         editable: Optional[List[bool]] = None) -> Tuple[dict, int]:
+    # Переносит правки текста абзаца на его элементы текста.
+    # Новый текст ставится в первый элемент, затронутый правкой, из остальных
+    # затронутых элементов удаляется. Правка, задевающая нередактируемый элемент
+    # (табуляцию, разрыв строки), пропускается. Возвращает {номер элемента: новый текст}
+    # только для изменившихся элементов и число выполненных правок.
+    starts = []
+    ends = []
+    offset = 0
+    for text in texts:
+        starts.append(offset)
+        offset += len(text)
+        ends.append(offset)
+
+    texts = list(texts)
+    changed = {}
+    applied = 0
+
+    # Правки идут с конца абзаца: границы фрагментов перед правкой не сдвигаются
+    for span_start, span_end, new_text in sorted(edits, reverse=True):
+        first = last = None
+        for i in range(len(texts)):
+            if first is None and starts[i] <= span_start < ends[i]:
+                first = i
+            if first is not None and span_end <= ends[i]:
+                last = i
+                break
+        if first is None or last is None:
+            continue
+        if editable is not None and not all(editable[first:last + 1]):
+            continue
 
-        # Обновляем текст абзаца
-        if replacements_count > 0:
-            paragraph.text = ' '.join(new_words)
+        for i in range(first, last + 1):
+            head = texts[i][:span_start - starts[i]] if i == first else ""
+            tail = texts[i][span_end - starts[i]:] if i == last else ""
+            texts[i] = head + (new_text if i == first else "") + tail
+            changed[i] = texts[i]
+        applied += 1
+
+    return changed, applied
+
+
+def _structure_checkers(doc_type: str) -> List[_Checker]:
+    # Проверки пункта «структура» в порядке вывода ошибок
+    return [
+        _RequiredFieldsChecker(doc_type),
+        _FormattingChecker(),
+        _ParagraphsStructureChecker(),
+        _ListsFormattingChecker(),
+        _FontsAndSizesChecker(),
+        _DateChecker()
+    ]
 
-    return replacements_count
 
-def check_structure(document, doc_type: str) -> List[str]:
+def check_structure(document, doc_type: str, profile: Optional[CheckProfile] = None) -> List[Finding]:
     # Проверяет структуру документа по ГОСТу
-    errors = []
+    return _run_checkers(document, _structure_checkers(doc_type), profile=profile)
 
-    # Используем новую функцию проверки реквизитов
-    errors.extend(check_required_fields(document, doc_type))
 
-    # Дополнительные проверки структуры
-    text_sample = " ".join(p.text for p in document.paragraphs[:5])
-    #Проверка Оформления
-    errors.extend(check_formatting(document))
-    errors.extend(check_paragraphs_structure(document))
-    errors.extend(check_lists_formatting(document))
-    errors.extend(check_fonts_and_sizes(document))
+class _DateChecker(_Checker):
+    # Проверка наличия даты в первых абзацах документа
+    SAMPLE_SIZE = 5
 
-    # Проверка наличия даты
-    if "202" not in text_sample:
-        errors.append("• Возможно отсутствует дата документа")
+    def __init__(self):
+        super().__init__()
+        self.sample = []
 
-    return errors
+    def visit(self, paragraph):
+        # Колонтитулы и сноски идут после основного текста и в выборку не входят
+        if len(self.sample) < self.SAMPLE_SIZE and paragraph.area in ("body", "table"):
+            self.sample.append(paragraph.text)
 
+    def finish(self):
+        text_sample = " ".join(self.sample)
+        if "202" not in text_sample:
+            self.errors.append(Finding("structure.date", "warning"))
+        return self.errors
 
-def check_fonts_and_sizes(document) -> List[str]:
-    # Проверка шрифтов и размеров по ГОСТу
-    errors = []
-    non_times_fonts = set()
-    wrong_sizes = set()
 
-    for i, paragraph in enumerate(document.paragraphs):
+class _FontsAndSizesChecker(_Checker):
+    mergeable = True
+
+    def __init__(self):
+        super().__init__()
+        # Словари вместо множеств: шрифты и размеры выводятся в порядке
+        # первого появления, одинаково при проверке целиком и по частям
+        self.non_times_fonts = {}
+        self.wrong_sizes = {}
+
+    def visit(self, paragraph):
         if not paragraph.text.strip():
-            continue
+            return
 
-        is_heading = _is_heading(paragraph)
+        is_heading = paragraph.is_heading
 
         for run in paragraph.runs:
             if not run.text.strip():
                 continue
 
             # Проверка шрифта
-            if hasattr(run, 'font') and run.font.name:
-                font_name = run.font.name.lower()
+            if run.font_name:
+                font_name = run.font_name.lower()
                 allowed_fonts = ['times', 'times new roman']
 
                 if not any(allowed in font_name for allowed in allowed_fonts):
-                    non_times_fonts.add(run.font.name)
+                    self.non_times_fonts[run.font_name] = None
 
-            # Проверка размера шрифта
-            if hasattr(run, 'font') and hasattr(run.font, 'size') and run.font.size:
-                try:
-                    # Конвертируем в пункты (1 point = 12700)
-                    if hasattr(run.font.size, 'pt'):
-                        size_pt = run.font.size.pt
-                    else:
-                        size_pt = run.font.size / 12700
-
-                    if is_heading:
-                        # Для заголовков: 14-16 pt
-                        if size_pt < 14 or size_pt > 16:
-                            wrong_sizes.add(f"заголовок: {size_pt:.1f}pt (требуется 14-16pt)")
-                    else:
-                        # Для основного текста: 12-14 pt
-                        if size_pt < 12 or size_pt > 14:
-                            wrong_sizes.add(f"текст: {size_pt:.1f}pt (требуется 12-14pt)")
-
-                except (AttributeError, TypeError):
-                    continue
+            # Проверка размера шрифта (колонтитулы и сноски набираются мельче)
+            size_pt = run.size_pt
+            if size_pt is None or paragraph.area not in ("body", "table"):
+                continue
 
-    # Формируем ошибки
-    if non_times_fonts:
-        fonts_list = ', '.join(non_times_fonts)
-        errors.append(f"• Обнаружены нерекомендуемые шрифты: {fonts_list} (ГОСТ: Times New Roman)")
+            if is_heading:
+                # Для заголовков: 14-16 pt
+                if size_pt < 14 or size_pt > 16:
+                    self.wrong_sizes[f"заголовок: {size_pt:.1f}pt (требуется 14-16pt)"] = None
+            else:
+                # Для основного текста: 12-14 pt
+                if size_pt < 12 or size_pt > 14:
+                    self.wrong_sizes[f"текст: {size_pt:.1f}pt (требуется 12-14pt)"] = None
 
-    if wrong_sizes:
-        sizes_list = '; '.join(wrong_sizes)
-        errors.append(f"• Несоответствие размеров шрифта: {sizes_list}")
+    def state(self):
+        return self.non_times_fonts, self.wrong_sizes
 
-    return errors
+    def merge(self, state):
+        fonts, sizes = state
+        self.non_times_fonts.update(fonts)
+        self.wrong_sizes.update(sizes)
 
-def check_formatting(document) -> List[str]:
-    # Проверяет базовое оформление документа по ГОСТ Р 7.0.97-2016
-    errors = []
+    def finish(self):
+        # Формируем ошибки
+        if self.non_times_fonts:
+            fonts_list = ', '.join(self.non_times_fonts)
+            self.errors.append(Finding("structure.fonts", "error", text=fonts_list))
 
-    for i, paragraph in enumerate(document.paragraphs):
-        if not paragraph.text.strip():
-            continue
+        if self.wrong_sizes:
+            sizes_list = '; '.join(self.wrong_sizes)
+            self.errors.append(Finding("structure.font_sizes", "error", text=sizes_list))
+
+        return self.errors
+
+
+def check_fonts_and_sizes(document) -> List[Finding]:
+    # Проверка шрифтов и размеров по ГОСТу
+    return _run_checkers(document, [_FontsAndSizesChecker()])
+
+
+class _FormattingChecker(_Checker):
+    local = True
+    mergeable = True
+    rules = ("structure.alignment", "structure.uppercase")
+
+    def visit(self, paragraph):
+        text = paragraph.text
+        if not text.strip():
+            return
 
         # Проверка выравнивания (ГОСТ: по ширине для основного текста)
-        if hasattr(paragraph, 'alignment') and paragraph.alignment:
-            # 0=left, 1=center, 2=right, 3=justify
-            if paragraph.alignment not in [0, 3]:  # Допустимо: по левому краю и по ширине
-                errors.append(f"• Стр. {i + 1}: Рекомендуется выравнивание по ширине или левому краю")
+        # 0=left, 1=center, 2=right, 3=justify
+        if paragraph.in_body and paragraph.alignment and paragraph.alignment not in [0, 3]:  # Допустимо: по левому краю и по ширине
+            self.errors.append(Finding("structure.alignment", "warning", paragraph.index))
 
         # Проверка на использование CAPSLOCK (не рекомендуется)
-        text = paragraph.text
         if len(text) > 10 and text.isupper():
-            errors.append(f"• Стр. {i + 1}: Избегайте написания всего текста в верхнем регистре")
+            self.errors.append(Finding("structure.uppercase", "warning", paragraph.index,
+                                       location=paragraph.location))
 
-    return errors
 
+def check_formatting(document) -> List[Finding]:
+    # Проверяет базовое оформление документа по ГОСТ Р 7.0.97-2016
+    return _run_checkers(document, [_FormattingChecker()])
 
-def check_paragraphs_structure(document) -> List[str]:
-    # Проверяет структуру абзацев по ГОСТу
-    errors = []
 
-    # Проверка длины абзацев (не должны быть слишком длинными)
-    for i, paragraph in enumerate(document.paragraphs):
-        text = paragraph.text.strip()
-        if len(text) > 500:  # Слишком длинный абзац
-            errors.append(f"• Стр. {i + 1}: Абзац слишком длинный (разбейте на несколько)")
+class _ParagraphsStructureChecker(_Checker):
+    def __init__(self):
+        super().__init__()
+        self.previous = None  # Предыдущий абзац
+
+    def visit(self, paragraph):
+        # Соседство заголовков имеет смысл только в основном тексте
+        if not paragraph.in_body:
+            return
+
+        # Проверка длины абзацев (не должны быть слишком длинными)
+        if len(paragraph.text.strip()) > 500:  # Слишком длинный абзац
+            self.errors.append(Finding("structure.long_paragraph", "warning", paragraph.index))
 
         # Проверка на отсутствие текста между заголовками
-        if i > 0 and _is_heading(paragraph) and _is_heading(document.paragraphs[i - 1]):
-            if not document.paragraphs[i - 1].text.strip():
-                errors.append(f"• Стр. {i + 1}: Между заголовками должен быть текст")
+        previous = self.previous
+        if previous is not None and paragraph.is_heading and previous.is_heading:
+            if not previous.text.strip():
+                self.errors.append(Finding("structure.empty_between_headings", "error", paragraph.index))
 
-    return errors
+        self.previous = paragraph
 
 
-def _is_heading(paragraph) -> bool:
-    # Проверяет, является ли абзац заголовком
-    return (hasattr(paragraph, 'style') and
-            hasattr(paragraph.style, 'name') and
-            paragraph.style.name.startswith('Heading'))
+def check_paragraphs_structure(document) -> List[Finding]:
+    # Проверяет структуру абзацев по ГОСТу
+    return _run_checkers(document, [_ParagraphsStructureChecker()])
 
 
-def check_lists_formatting(document) -> List[str]:
-    # Проверяет оформление списков по ГОСТу
-    errors = []
+class _ListsFormattingChecker(_Checker):
+    local = True
+    mergeable = True
+    rules = ("structure.empty_list_item", "structure.empty_numbered_item")
 
-    for i, paragraph in enumerate(document.paragraphs):
+    def visit(self, paragraph):
         text = paragraph.text.strip()
-
         # Проверка маркированных списков
         if text.startswith(('•', '-', '—', '–')):
             if not text[1:].strip():  # Пустой элемент списка
-                errors.append(f"• Стр. {i + 1}: Пустой элемент списка")
+                self.errors.append(Finding("structure.empty_list_item", "error", paragraph.index,
+                                           location=paragraph.location))
 
         # Проверка нумерованных списков
         if re.match(r'^\d+[\.\)]', text):
             if not text[2:].strip():  # Пустой элемент списка
-                errors.append(f"• Стр. {i + 1}: Пустой элемент нумерованного списка")
+                self.errors.append(Finding("structure.empty_numbered_item", "error", paragraph.index,
+                                           location=paragraph.location))
 
-    return errors
 
-def check_required_fields(document, doc_type: str) -> List[str]:
-    # Проверяет наличие обязательных реквизитов по ГОСТ Р 7.0.97-2016
-    errors = []
-    full_text = " ".join(p.text for p in document.paragraphs).lower()
+def check_lists_formatting(document) -> List[Finding]:
+    # Проверяет оформление списков по ГОСТу
+    return _run_checkers(document, [_ListsFormattingChecker()])
 
-    # Обязательные реквизиты для разных типов документов
-    REQUIRED_FIELDS = {
-        "приказ": ["приказ"],
-        "служебная записка": ["служебная записка"],
-        "отчёт": ["отчёт", "реферат", "список использованных источников","заключение"]
-    }
 
-    required = REQUIRED_FIELDS.get(doc_type, [])
-    for field in required:
-        if field not in full_text:
-            errors.append(f"• Отсутствует обязательный реквизит: '{field}'")
+# Обязательные реквизиты для разных типов документов
+REQUIRED_FIELDS = {
+    "приказ": ["приказ"],
+    "служебная записка": ["служебная записка"],
+    "отчёт": ["отчёт", "реферат", "список использованных источников","заключение"]
+}
 
-    return errors
 
+class _RequiredFieldsChecker(_Checker):
+    # Реквизиты ищутся по ходу обхода в тексте документа, склеенном через пробел.
+    # Весь текст не хранится: от уже просмотренного остаётся только хвост
+    # короче самого длинного реквизита, чтобы найти реквизит на стыке абзацев.
+    def __init__(self, doc_type: str):
+        super().__init__()
+        self.doc_type = doc_type
+        self.required = REQUIRED_FIELDS.get(doc_type, [])
+        self.missing = list(self.required)
+        self.tail_size = max((len(name) for name in self.required), default=1) - 1
+        self.tail = None  # None — ещё не было ни одного абзаца
 
-def extract_headings(document) -> List[Heading]:
+    def visit(self, paragraph):
+        if not self.missing:
+            return
+
+        text = paragraph.text.lower()
+        window = text if self.tail is None else f"{self.tail} {text}"
+        self.missing = [name for name in self.missing if name not in window]
+        self.tail = window[-self.tail_size:] if self.tail_size else ""
+
+    def finish(self):
+        for field_name in self.required:
+            if field_name in self.missing:
+                self.errors.append(Finding("structure.required_field", "error", text=field_name))
+
+        return self.errors
+
+
+def check_required_fields(document, doc_type: str) -> List[Finding]:
+    # Проверяет наличие обязательных реквизитов по ГОСТ Р 7.0.97-2016
+    return _run_checkers(document, [_RequiredFieldsChecker(doc_type)])
+
+
+class _HeadingsCollector(_Checker):
     # Извлекает заголовки из документа на основе стилей.
     # Строго по ГОСТу - точка после номера НЕ допускается.
-    headings = []
+    # Заголовки частей документа склеиваются по порядку, а нумерация
+    # проверяется уже по полному списку (_NumberingChecker.finish).
+    mergeable = True
 
-    for i, paragraph in enumerate(document.paragraphs):
-        if not paragraph.text.strip():
-            continue
+    def __init__(self):
+        super().__init__()
+        self.headings = []
 
-        # Определяем уровень заголовка по стилю
-        level = None
-        if paragraph.style.name.startswith('Heading'):
-            try:
-                level = int(paragraph.style.name.split()[-1])
-            except (ValueError, IndexError):
-                continue
+    def visit(self, paragraph):
+        # Уровень заголовка определён по стилю при сканировании;
+        # нумеруются только заголовки основного текста
+        level = paragraph.heading_level
+        if level is None or not paragraph.in_body:
+            return
 
-        if level is not None:
-            text = paragraph.text.strip()
-
-            # Строгий парсинг по ГОСТу - номер и текст разделяются пробелом
-            # Формат: "1 Текст" или "1.1 Текст" (без точки после номера)
-            parts = text.split(' ', 1)
-            if len(parts) > 1:
-                potential_number = parts[0]
-
-                # Проверяем, что это номер в правильном формате (без точки в конце)
-                if _is_valid_number_format(potential_number, level):
-                    number = potential_number
-                    remaining_text = parts[1]
-                else:
-                    # Если номер с точкой в конце - это ошибка
-                    number = ""
-                    remaining_text = text
+        text = paragraph.text.strip()
+        if not text:
+            return
+
+        # Строгий парсинг по ГОСТу - номер и текст разделяются пробелом
+        # Формат: "1 Текст" или "1.1 Текст" (без точки после номера)
+        parts = text.split(' ', 1)
+        if len(parts) > 1:
+            potential_number = parts[0]
+
+            # Проверяем, что это номер в правильном формате (без точки в конце)
+            if _is_valid_number_format(potential_number, level):
+                number = potential_number
+                remaining_text = parts[1]
             else:
-                # Нет пробела после номера или номер отсутствует
+                # Если номер с точкой в конце - это ошибка
                 number = ""
                 remaining_text = text
+        else:
+            # Нет пробела после номера или номер отсутствует
+            number = ""
+            remaining_text = text
+
+        self.headings.append(Heading(
+            level=level,
+            text=remaining_text.strip(),
+            paragraph_index=paragraph.index,
+            number=number
+        ))
 
-            headings.append(Heading(
-                level=level,
-                text=remaining_text.strip(),
-                paragraph_index=i,
-                number=number
-            ))
+    def state(self):
+        return self.headings
 
-    return headings
+    def merge(self, state):
+        self.headings.extend(state)
+
+
+def extract_headings(document) -> List[Heading]:
+    # Извлекает заголовки из документа на основе стилей.
+    collector = _HeadingsCollector()
+    _run_checkers(document, [collector])
+    return collector.headings
 
 def _is_valid_number_format(number: str, level: int) -> bool:
     """
@@ -350,7 +2020,7 @@ def _is_valid_number_format(number: str, level: int) -> bool:
     return True
 
 
-def _check_sequence(heading: Heading, current_numbers: dict, index: int, all_headings: List[Heading]) -> Optional[str]:
+def _check_sequence(heading: Heading, current_numbers: dict, index: int, all_headings: List[Heading]) -> Optional[Finding]:
     # Упрощенная и надежная проверка последовательности.
     parts = [int(p) for p in heading.number.split('.')]
     level = heading.level
@@ -361,13 +2031,15 @@ def _check_sequence(heading: Heading, current_numbers: dict, index: int, all_hea
     if level not in current_numbers:
         # Новый уровень - должен начинаться с 1
         if current_num != 1:
-            return f"• Стр. {heading.paragraph_index + 1}: Первый номер на уровне {level} должен быть 1, а не {current_num}"
+            return Finding("numbering.first", "error", heading.paragraph_index,
+                           text=heading.number, params={"level": level, "actual": current_num})
         current_numbers[level] = current_num
     else:
         # Проверяем последовательность
         expected = current_numbers[level] + 1
         if current_num != expected:
-            return f"• Стр. {heading.paragraph_index + 1}: Ожидался номер {expected}, а не {current_num} на уровне {level}"
+            return Finding("numbering.sequence", "error", heading.paragraph_index, text=heading.number,
+                           params={"level": level, "expected": expected, "actual": current_num})
         current_numbers[level] = current_num
 
     # Сбрасываем более глубокие уровни
@@ -377,13 +2049,17 @@ def _check_sequence(heading: Heading, current_numbers: dict, index: int, all_hea
 
     return None
 
-def check_numbering(document, doc_type: str = "приказ") -> List[str]:
-    # Проверяет правильность нумерации разделов документа.
+
+class _NumberingChecker(_HeadingsCollector):
+    def finish(self):
+        return _check_headings_numbering(self.headings)
+
+
+def _check_headings_numbering(headings: List[Heading]) -> List[Finding]:
     errors = []
-    headings = extract_headings(document)
 
     if not headings:
-        return ["• Документ не содержит заголовков с нумерацией"]
+        return [Finding("numbering.no_headings", "error")]
 
     # Словарь для отслеживания текущих номеров на каждом уровне
     current_numbers = {}
@@ -394,10 +2070,8 @@ def check_numbering(document, doc_type: str = "приказ") -> List[str]:
         # Проверяем формат номера
         if heading.number:
             if not _is_valid_number_format(heading.number, level):
-                errors.append(
-                    f"• Стр. {heading.paragraph_index + 1}: "
-                    f"Неверный формат номера '{heading.number}' для уровня {level}"
-                )
+                errors.append(Finding("numbering.format", "error", heading.paragraph_index,
+                                      text=heading.number, params={"level": level}))
                 continue
 
             # Проверяем последовательность
@@ -405,9 +2079,12 @@ def check_numbering(document, doc_type: str = "приказ") -> List[str]:
             if error_msg:
                 errors.append(error_msg)
         else:
-            errors.append(
-                f"• Стр. {heading.paragraph_index + 1}: "
-                f"Заголовок уровня {level} не содержит номера"
-            )
+            errors.append(Finding("numbering.missing", "error", heading.paragraph_index,
+                                  params={"level": level}))
 
-    return errors
\ No newline at end of file
+    return errors
+
+
+def check_numbering(document, doc_type: str = "приказ") -> List[Finding]:
+    # Проверяет правильность нумерации разделов документа.
+    return _run_checkers(document, [_NumberingChecker()])
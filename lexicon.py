@@ -0,0 +1,410 @@
+"""
+Скомпилированные словари NormaText: поиск запрещённых слов и фраз за один проход.
+
+По умолчанию используются словари из dictionaries.py. Большие словари ведутся
+в CSV и компилируются в файл словаря (python -m normatext compile-dictionary):
+записи лемматизируются заранее, файл загружается без разбора и морфологии.
+В файл словаря входит и таблица всех словоформ слов записей, поэтому
+проверка по нему обходится без морфологического анализатора, а также
+парадигмы замен, по которым исправление ставит замену в форму исправляемого слова.
+Путь к файлу задаётся NORMATEXT_DICTIONARY; изменённый файл подхватывается
+при следующей проверке без перезапуска.
+"""
+
+import csv
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+import dictionaries
+from dictionaries import FORBIDDEN_WORDS, TERMINOLOGY_REPLACEMENTS
+
+# Ключ узла дерева, под которым хранится найденная фраза (леммы не бывают пустыми)
+_END = ""
+
+
+class PhraseMatcher:
+    # Префиксное дерево по последовательностям лемм.
+    # Однословные и многословные записи ищутся одним линейным проходом,
+    # стоимость на слово не зависит от размера словаря.
+
+    def __init__(self, entries: Dict[str, object], root: Optional[dict] = None):
+        # entries: «фраза в нормальной форме» -> связанное значение;
+        # root — готовое дерево из файла словаря
+        self.root = root if root is not None else {}
+        for phrase, value in entries.items():
+            self.add(phrase, value)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.entries())
+
+    def entries(self) -> Iterator[Tuple[str, object]]:
+        # Все записи дерева: (фраза, значение)
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            for key, child in node.items():
+                if key == _END:
+                    yield child
+                else:
+                    stack.append(child)
+
+    def add(self, phrase: str, value: object):
+        words = phrase.split()
+        if not words:
+            return
+
+        node = self.root
+        for word in words:
+            node = node.setdefault(word, {})
+        node[_END] = (phrase, value)
+
+    def find(self, lemmas: List[Optional[str]]) -> Iterator[Tuple[int, int, str, object]]:
+        # Ищет самые длинные совпадения слева направо.
+        # lemmas: леммы слов абзаца, None — слово, которое разрывает фразу.
+        # Возвращает (начало, конец) в индексах слов, фразу и её значение.
+        i = 0
+        n = len(lemmas)
+        while i < n:
+            node = self.root
+            match = None
+            j = i
+            while j < n:
+                node = node.get(lemmas[j])
+                if node is None:
+                    break
+                j += 1
+                if _END in node:
+                    match = (j, node[_END])
+
+            if match:
+                end, (phrase, value) = match
+                yield i, end, phrase, value
+                i = end
+            else:
+                i += 1
+
+
+# Грамматические категории pymorphy3, которые переносятся с исправляемого слова на замену
+INFLECT_CATEGORIES = ("POS", "case", "number", "gender", "person", "tense", "animacy")
+
+# Если формы со всеми категориями нет, категории отбрасываются в этом порядке
+# (у существительного свой род и т. п.; вид глагола не переносится вовсе).
+# Падеж и время не отбрасываются: замена в другом времени меняет смысл
+_RELAX_ORDER = ("animacy", "gender", "person", "POS", "number")
+
+# Части речи главного слова замены (если в замене нет существительного)
+_INFLECTABLE = ("ADJF", "PRTF", "VERB", "INFN", "NPRO")
+
+# Слова перед главным, которые с ним согласуются
+_AGREEING = ("ADJF", "PRTF")
+
+
+class Replacement(NamedTuple):
+    # Замена с заранее построенными парадигмами: слова замены, формы
+    # изменяемых слов [(граммемы, форма), ...] (None — слово не изменяется)
+    # и номер главного слова (None — замена не склоняется)
+    words: Tuple[str, ...]
+    forms: Tuple[Optional[Tuple[Tuple[tuple, str], ...]], ...]
+    head: Optional[int]
+
+
+class Lexicon(NamedTuple):
+    # Словари одной версии: запрещённые фразы (значение — предлагаемая замена
+    # или None), замены для исправления, хэш, по которому кэш результатов
+    # отличает версии словарей, таблица словоформ (см. expand_forms;
+    # None — леммы слов текста определяет морфологический анализатор),
+    # граммемы словоформ из таблицы и парадигмы замен (см. build_replacements)
+    forbidden: PhraseMatcher
+    replacements: PhraseMatcher
+    version: str
+    forms: Optional[Dict[str, str]] = None
+    tags: Optional[Dict[str, tuple]] = None
+    inflections: Optional[Dict[str, Replacement]] = None
+
+
+def build_lexicon(forbidden_words: Iterable[str], replacements: Dict[str, str], version: str,
+                  forms: Optional[Dict[str, str]] = None, tags: Optional[Dict[str, tuple]] = None,
+                  inflections: Optional[Dict[str, Replacement]] = None) -> Lexicon:
+    return Lexicon(
+        PhraseMatcher({phrase: replacements.get(phrase) for phrase in forbidden_words}),
+        PhraseMatcher(replacements),
+        version,
+        forms,
+        tags,
+        inflections,
+    )
+
+
+def grammemes(tag) -> tuple:
+    # Значения INFLECT_CATEGORIES у разбора pymorphy3 (None — категории нет);
+    # граммемы pymorphy3 приводятся к str, чтобы их можно было сохранить в файл словаря
+    values = (getattr(tag, category) for category in INFLECT_CATEGORIES)
+    return tuple(None if value is None else str(value) for value in values)
+
+
+def build_replacements(values: Iterable[str], morph) -> Dict[str, Replacement]:
+    # Парадигмы замен строятся один раз: при исправлении форма выбирается
+    # поиском по готовому списку, без вызовов анализатора.
+    # Главное слово — первое существительное замены (иначе первое изменяемое
+    # слово); прилагательные перед ним согласуются с ним, остальные слова
+    # («большой объём работы» — «работы») не изменяются.
+    result = {}
+    for value in values:
+        words = tuple(value.split())
+        if not words:
+            continue
+
+        parses = []
+        for word in words:
+            # Разбор, для которого слово замены — словарная форма (с точностью до «ё»)
+            word = word.lower().replace("ё", "е")
+            candidates = [p for p in morph.parse(word) if p.normal_form.replace("ё", "е") == word]
+            parses.append(candidates[0] if candidates else None)
+
+        pos = [p.tag.POS if p else None for p in parses]
+        head = next((i for i, value_pos in enumerate(pos) if value_pos == "NOUN"), None)
+        if head is None:
+            head = next((i for i, value_pos in enumerate(pos) if value_pos in _INFLECTABLE), None)
+
+        forms = []
+        for i, parse in enumerate(parses):
+            inflected = parse is not None and head is not None and (
+                i == head or (i < head and pos[i] in _AGREEING))
+            if not inflected:
+                forms.append(None)
+                continue
+            # Написание через «е» в словаре сохраняется и в формах
+            keep_yo = "ё" in words[i].lower()
+            forms.append(tuple((grammemes(form.tag), form.word if keep_yo else form.word.replace("ё", "е"))
+                               for form in parse.lexeme))
+        result[value] = Replacement(words, tuple(forms), head)
+    return result
+
+
+def _select_form(forms, wanted: dict) -> Optional[Tuple[tuple, str]]:
+    # Форма с нужными значениями категорий; недостающие отбрасываются по _RELAX_ORDER
+    wanted = {INFLECT_CATEGORIES.index(c): v for c, v in wanted.items() if v is not None}
+    for dropped in range(len(_RELAX_ORDER) + 1):
+        skip = {INFLECT_CATEGORIES.index(c) for c in _RELAX_ORDER[:dropped]}
+        want = [(i, v) for i, v in wanted.items() if i not in skip]
+        for form in forms:
+            if all(form[0][i] == v for i, v in want):
+                return form
+    return None
+
+
+def inflect_replacement(replacement: Replacement, source: Optional[tuple]) -> Optional[str]:
+    # Ставит замену в форму исправляемого слова (граммемы source, см. grammemes).
+    # None — у замены нет формы личного глагола в том же времени (у «отметить»
+    # нет настоящего): исправлять такое слово нельзя, подставив инфинитив
+    wanted = dict(zip(INFLECT_CATEGORIES, source or ()))
+    if replacement.head is None or not any(v for c, v in wanted.items() if c != "POS"):
+        # Неизменяемое слово или словарная форма (инфинитив, наречие): замена как есть
+        return " ".join(replacement.words)
+
+    words = list(replacement.words)
+    head_form = _select_form(replacement.forms[replacement.head], wanted)
+    if head_form is None:
+        return None if wanted.get("POS") == "VERB" else " ".join(words)
+    words[replacement.head] = head_form[1]
+
+    # Согласование с главным словом: его падеж, число, род и одушевлённость
+    head_tag = dict(zip(INFLECT_CATEGORIES, head_form[0]))
+    agreement = {"case": head_tag["case"], "number": head_tag["number"], "animacy": head_tag["animacy"],
+                 "gender": head_tag["gender"] if head_tag["number"] != "plur" else None}
+    for i in range(replacement.head):
+        if replacement.forms[i] is not None:
+            form = _select_form(replacement.forms[i], {"POS": "ADJF", **agreement})
+            if form is not None:
+                words[i] = form[1]
+    return " ".join(words)
+
+
+# Парадигмы замен для словарей без них (встроенные словари строятся при
+# импорте, когда анализатор ещё не загружен): версия -> {замена: Replacement}
+_inflections_cache = {}
+_inflections_lock = threading.Lock()
+
+
+def lexicon_inflections(lexicon: Lexicon, morph) -> Dict[str, Replacement]:
+    # Парадигмы замен словаря; для словаря без них строятся один раз на процесс
+    if lexicon.inflections is not None:
+        return lexicon.inflections
+    with _inflections_lock:
+        if lexicon.version not in _inflections_cache:
+            values = {value for _, value in lexicon.replacements.entries() if value}
+            _inflections_cache[lexicon.version] = build_replacements(values, morph)
+        return _inflections_cache[lexicon.version]
+
+
+def expand_forms(words: Iterable[str], morph) -> Dict[str, str]:
+    # Таблица словоформ: {форма в нижнем регистре: слово записи}.
+    # Все формы слов записей берутся из их парадигм (lexeme) в pymorphy3,
+    # вместе с написанием через «е» вместо «ё». В таблицу попадает форма,
+    # которую анализатор сам приводит к слову записи (первый разбор), — так
+    # поиск по таблице даёт те же леммы, что и разбор каждого слова текста.
+    # Формы, которые относятся к словам записей только по одному из разборов
+    # (например, «стали» — «стать», а не «сталь»), в таблицу не попадают.
+    words = set(words)
+    candidates = set(words)
+    for word in words:
+        for parse in morph.parse(word):
+            if parse.normal_form == word:
+                candidates.update(form.word for form in parse.lexeme)
+    candidates.update([form.replace("ё", "е") for form in candidates])
+
+    forms = {}
+    for form in sorted(candidates):
+        lemma = morph.parse(form)[0].normal_form
+        if lemma in words:
+            forms[form] = lemma
+    return forms
+
+
+def _file_hash(path) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+# Встроенные словари компилируются один раз при импорте
+BUILTIN = build_lexicon(FORBIDDEN_WORDS, TERMINOLOGY_REPLACEMENTS, _file_hash(dictionaries.__file__))
+
+
+# Формат файла словаря; файлы другого формата не загружаются
+ARTIFACT_FORMAT = 5
+
+# Столбцы CSV-источника. forbidden: 1 — слово запрещено, 0 — только замена;
+# replacement: пусто — замены нет, "-" — слово удаляется при исправлении
+SOURCE_COLUMNS = ("phrase", "forbidden", "replacement")
+DELETE_MARK = "-"
+
+
+def read_source(path) -> Tuple[List[str], Dict[str, str]]:
+    # Читает CSV-источник: (запрещённые фразы, {фраза: замена})
+    forbidden = []
+    replacements = {}
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        reader = csv.DictReader(f)
+        missing = [column for column in SOURCE_COLUMNS if column not in (reader.fieldnames or ())]
+        if missing:
+            raise ValueError(f"{path}: нет столбцов {', '.join(missing)}")
+        for line, row in enumerate(reader, 2):
+            phrase = " ".join((row["phrase"] or "").split())
+            if not phrase:
+                continue
+            flag = (row["forbidden"] or "").strip()
+            if flag not in ("0", "1"):
+                raise ValueError(f"{path}, строка {line}: forbidden должно быть 0 или 1")
+            if flag == "1":
+                forbidden.append(phrase)
+            replacement = (row["replacement"] or "").strip()
+            if replacement:
+                replacements[phrase] = "" if replacement == DELETE_MARK else replacement
+    return forbidden, replacements
+
+
+def compile_dictionary(sources: Iterable, target, morph, builtin: bool = False) -> Lexicon:
+    # Компилирует CSV-источники в файл словаря target.
+    # Каждое слово записи приводится к нормальной форме анализатором morph
+    # (pymorphy3), поэтому записи можно вести в любой форме. При повторе
+    # фразы в нескольких источниках действует последняя замена.
+    # builtin=True — добавить встроенные словари (они уже в нормальной форме
+    # и не приводятся к ней повторно).
+    def normalize(phrase: str) -> str:
+        return " ".join(morph.parse(word)[0].normal_form for word in phrase.lower().split())
+
+    forbidden = {}
+    replacements = {}
+    if builtin:
+        forbidden.update(dict.fromkeys(FORBIDDEN_WORDS))
+        replacements.update(TERMINOLOGY_REPLACEMENTS)
+    for source in sources:
+        source_forbidden, source_replacements = read_source(source)
+        for phrase in source_forbidden:
+            forbidden[normalize(phrase)] = None
+        for phrase, replacement in source_replacements.items():
+            replacements[normalize(phrase)] = replacement
+
+    # Версия зависит только от содержимого: повторная компиляция тех же
+    # записей не сбрасывает кэш результатов
+    digest = hashlib.sha256(str(ARTIFACT_FORMAT).encode())
+    for phrase in sorted(forbidden):
+        digest.update(f"-{phrase}\n".encode())
+    for phrase, replacement in sorted(replacements.items()):
+        digest.update(f"+{phrase}\t{replacement}\n".encode())
+
+    words = {word for phrase in [*forbidden, *replacements] for word in phrase.split()}
+    forms = expand_forms(words, morph)
+    tags = {form: grammemes(morph.parse(form)[0].tag) for form in forms}
+    inflections = build_replacements({value for value in replacements.values() if value}, morph)
+    lexicon = build_lexicon(forbidden, replacements, digest.hexdigest(), forms, tags, inflections)
+    data = pickle.dumps({
+        "format": ARTIFACT_FORMAT,
+        "version": lexicon.version,
+        "forbidden": lexicon.forbidden.root,
+        "replacements": lexicon.replacements.root,
+        "forms": lexicon.forms,
+        "tags": lexicon.tags,
+        "inflections": inflections,
+    }, protocol=pickle.HIGHEST_PROTOCOL)
+
+    # Запись через временный файл: проверка, идущая в это время,
+    # никогда не прочитает словарь наполовину
+    target = Path(target)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=target.parent, prefix=target.name, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, target)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return lexicon
+
+
+def load_dictionary(path) -> Lexicon:
+    # Загружает скомпилированный словарь. Файл словаря — доверенный, как и
+    # dictionaries.py: он создаётся командой compile-dictionary
+    with open(path, "rb") as f:
+        data = pickle.load(f)
+    if not isinstance(data, dict) or data.get("format") != ARTIFACT_FORMAT:
+        raise ValueError(f"{path}: неподдерживаемый формат словаря")
+    return Lexicon(PhraseMatcher({}, data["forbidden"]), PhraseMatcher({}, data["replacements"]),
+                   data["version"], data["forms"], data["tags"], data["inflections"])
+
+
+# Загруженный файл словаря и его отметка (путь, время изменения, размер)
+_loaded = BUILTIN
+_loaded_stamp = None
+_load_lock = threading.Lock()
+
+
+def current_lexicon() -> Lexicon:
+    # Действующие словари: файл из NORMATEXT_DICTIONARY, иначе встроенные.
+    # Файл перечитывается, если он изменился с прошлой загрузки. Если новый
+    # файл не читается, остаются словари, загруженные ранее.
+    global _loaded, _loaded_stamp
+    path = os.environ.get("NORMATEXT_DICTIONARY")
+    if not path:
+        return BUILTIN
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return BUILTIN
+
+    stamp = (path, stat.st_mtime_ns, stat.st_size)
+    if stamp != _loaded_stamp:
+        with _load_lock:
+            if stamp != _loaded_stamp:
+                try:
+                    _loaded = load_dictionary(path)
+                except (OSError, ValueError, KeyError, pickle.UnpicklingError, EOFError):
+                    pass
+                _loaded_stamp = stamp
+    return _loaded
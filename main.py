@@ -2,9 +2,12 @@
 Точка входа в NormaText.
 """
 
+import os
 import tkinter as tk
 from ui import ModernNormaTextUI
-from core import load_document, check_terminology, check_structure, check_numbering, auto_fix_terminology, save_fixed_document
+from result_cache import open_cache, check_with_cache
+from core import (load_document, auto_fix_terminology, save_document, save_fixed_document, render_findings,
+                  warm_up_morph, CheckProfile, profiling_enabled, recheck_changed, resolved_findings)
 from tkinter import messagebox, filedialog
 import datetime
 
@@ -24,6 +27,16 @@ class NormaTextApp:
         self.current_errors = []  #
         self.fixed_errors = []
 
+        # Кэш результатов проверки (None, если недоступен)
+        self.result_cache = open_cache()
+
+        # Замеры последней проверки (только при NORMATEXT_PROFILE=1)
+        self.profile = None
+
+        # Параметры последней проверки (для перепроверки после исправления)
+        self.doc_type = None
+        self.rules = []
+
         # Создание пользовательского интерфейсас передачей callback-функций
         self.ui = ModernNormaTextUI(
             self.root,
@@ -33,57 +46,56 @@ class NormaTextApp:
             on_save=self.save_fixed
         )
 
-    def run_check(self, file_path: str, doc_type: str, rules: list):
-        try:
-            # Загрузка документа через ядро системы
-            self.document = load_document(file_path)
-            self.current_file_path = file_path
-
-            if self.document is None:
-                messagebox.showerror("Ошибка", "Не удалось загрузить документ")
-                return
-
-            errors = []
-
-            # Последовательный запуск выбранных пользователем проверок
-            if "терминология" in rules:
-                errors.extend(check_terminology(self.document))
-            if "структура" in rules:
-                errors.extend(check_structure(self.document, doc_type))
-            if "нумерация" in rules:
-                errors.extend(check_numbering(self.document, doc_type))
-
-            # Сохранение результатов проверки в атрибутах класса
-            self.original_errors = errors.copy()
-            self.current_errors = errors.copy()
-            self.fixed_errors = []
+        # Морфологический анализатор загружается в фоне, пока открыт первый экран
+        warm_up_morph()
+
+    def run_check(self, file_path: str, doc_type: str, rules: list,
+                  progress=None, cancel=None, on_result=None):
+        # Вызывается из рабочего потока интерфейса: обращаться к tkinter здесь нельзя,
+        # исключения (в том числе CheckCancelled) обрабатывает интерфейс
+        # Проверки читают файл потоково, дерево python-docx не строится;
+        # результаты для неизменённого документа берутся из кэша,
+        # большой документ проверяется по частям на всех ядрах
+        profile = CheckProfile() if profiling_enabled() else None
+        errors = check_with_cache(file_path, doc_type, rules, self.result_cache,
+                                  progress, cancel, on_result, profile, jobs=os.cpu_count() or 1)
+        self.profile = profile
+
+        # Сохранение результатов проверки в атрибутах класса
+        self.document = None
+        self.current_file_path = file_path
+        self.doc_type = doc_type
+        self.rules = list(rules)
+        self.original_errors = errors.copy()
+        self.current_errors = errors.copy()
+        self.fixed_errors = []
 
-            # Передаем список ошибок в UI
-            self.ui.update_report(errors)
+        # Список ошибок передаётся в UI из основного потока
+        return errors
 
-        except Exception as e:
-            messagebox.showerror("Ошибка", f"Не удалось обработать файл:\n{str(e)}")
+    def _get_document(self):
+        # Документ python-docx загружается только для исправления и сохранения
+        if self.document is None and self.current_file_path:
+            self.document = load_document(self.current_file_path)
+        return self.document
 
     def auto_fix(self):
         """Автоматическое исправление терминологии"""
-        if self.document is None:
+        if self.current_file_path is None:
             messagebox.showwarning("Внимание", "Сначала загрузите документ и выполните проверку!")
             return
 
         try:
             # 1. Вызов функции автоматического исправления из ядра системы
-            replacements_count = auto_fix_terminology(self.document)
+            changed = set()
+            replacements_count = auto_fix_terminology(self._get_document(), changed)
 
             if replacements_count > 0:
-                # 2. Разделение ошибок на исправленные и оставшиеся
-                fixed_errors = []
-                remaining_errors = []
-
-                for error in self.current_errors:
-                    if "Недопустимое слово" in error:
-                        fixed_errors.append(error)
-                    else:
-                        remaining_errors.append(error)
+                # 2. Перепроверка изменённых абзацев: правка могла изменить длину,
+                # регистр и содержимое списков, а не только убрать слово
+                remaining_errors = recheck_changed(self.document, self.current_errors, changed,
+                                                   self.doc_type, self.rules)
+                fixed_errors = resolved_findings(self.current_errors, remaining_errors)
 
                 # 3. Обновление состояния ошибок
                 self.fixed_errors = fixed_errors
@@ -94,8 +106,8 @@ class NormaTextApp:
 
                 messagebox.showinfo(
                     "Успех",
-                    f"Исправлено ошибок терминологии: {len(fixed_errors)}\n"
-                    f"Осталось других ошибок: {len(remaining_errors)}"
+                    f"Исправлено ошибок: {len(fixed_errors)}\n"
+                    f"Осталось ошибок: {len(remaining_errors)}"
                 )
             else:
                 messagebox.showinfo("Информация", "Не найдено слов для автоматического исправления")
@@ -119,8 +131,7 @@ class NormaTextApp:
 
         # Добавление текущих ошибок в отчет
         if self.current_errors:
-            for error in self.current_errors:
-                report_lines.append(f"• {error}")
+            report_lines.extend(render_findings(self.current_errors))
         else:
             report_lines.append("Ошибок не найдено")
 
@@ -131,7 +142,8 @@ class NormaTextApp:
                 "=" * 60,
                 "ИСПРАВЛЕННЫЕ ОШИБКИ (автоматически):",
                 "=" * 60,
-                "Проверьте правильность склонения исправленных слов:",
+                "Замены поставлены в падеж и число исправленных слов;",
+                "проверьте их согласование с соседними словами:",
                 ""
             ])
 
@@ -145,6 +157,16 @@ class NormaTextApp:
                 "=" * 60
             ])
 
+        # Замеры проверки (если профилирование включено)
+        if self.profile is not None:
+            report_lines.extend([
+                "",
+                "=" * 60,
+                "ПРОФИЛИРОВАНИЕ ПРОВЕРКИ:",
+                "=" * 60
+            ])
+            report_lines.extend(self.profile.render())
+
         report_text = "\n".join(report_lines)
 
         # Диалог сохранения файла
@@ -163,20 +185,18 @@ class NormaTextApp:
                 messagebox.showerror("Ошибка", f"Не удалось сохранить файл:\n{str(e)}")
 
     def save_fixed(self):
-        if self.document is None:
+        if self.current_file_path is None:
             messagebox.showwarning("Внимание", "Нет загруженного документа!")
             return
 
         try:
+            document = self._get_document()
+
             # Сценарий 1: Автоматическое сохранение с суффиксом
             if self.current_file_path:
-                # Разделение пути на имя и расширение
-                path_parts = self.current_file_path.rsplit('.', 1)
-                # Формирование нового пути с суффиксом
-                new_path = f"{path_parts[0]}_исправленный.docx"
-
-                # Вызов функции сохранения
-                result = save_fixed_document(self.document, new_path)
+                # Новый путь с суффиксом строит save_fixed_document; неизменённые
+                # части переносятся из исходного файла без пересжатия
+                result = save_fixed_document(document, self.current_file_path)
                 messagebox.showinfo("Успех", result)
 
             # Сценарий 2: интерактивный выбор места сохранения
@@ -189,7 +209,7 @@ class NormaTextApp:
                 # Если пользователь выбрал путь
                 if path:
                     # Непосредственное сохранение файла
-                    self.document.save(path)
+                    save_document(document, path, self.current_file_path)
                     messagebox.showinfo("Успех", f"Документ сохранён:\n{path}")
 
         except Exception as e:
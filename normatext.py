@@ -0,0 +1,212 @@
+"""
+Пакетная проверка NormaText из командной строки (без графического интерфейса).
+
+Пример:
+    python -m normatext check DIR --jobs 8 --rules терминология,структура --doc-type отчёт
+    python -m normatext compile-dictionary terms.csv --output terms.ntdict
+    python -m normatext serve --port 8765 --jobs 4
+
+Результат по каждому файлу выводится отдельной строкой JSON.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+from core import (CHECK_CATEGORIES, REQUIRED_FIELDS, CheckProfile, get_morph, memory_budget_mb,
+                  peak_memory_mb, profiling_enabled)
+from lexicon import compile_dictionary
+from result_cache import check_with_cache, open_cache
+
+
+# Кэш результатов текущего процесса (задаётся в _init_worker)
+_cache = None
+
+
+def find_documents(root: str) -> Iterator[Path]:
+    # Все .docx в каталоге и подкаталогах (временные файлы Word "~$..." пропускаются)
+    root_path = Path(root)
+    if root_path.is_file():
+        yield root_path
+        return
+
+    for path in sorted(root_path.rglob("*.docx")):
+        if not path.name.startswith("~$"):
+            yield path
+
+
+def check_file(path: str, doc_type: str, rules: List[str], profile: bool = False,
+               low_memory: bool = False, memory_budget: Optional[float] = None, jobs: int = 1) -> dict:
+    # Проверяет один документ; исключения превращаются в поле "error",
+    # чтобы один испорченный файл не останавливал всю пакетную проверку.
+    # profile=True добавляет в результат замеры проверки (поле "profile").
+    # В экономном режиме (low_memory, memory_budget) в результат добавляется
+    # пиковая память процесса (поле "peak_rss_mb"); документ, на котором
+    # превышен бюджет памяти, завершается ошибкой, а не падением процесса.
+    # jobs > 1 — большой документ проверяется по частям в пуле процессов.
+    started = time.perf_counter()
+    check_profile = CheckProfile() if profile else None
+    try:
+        # Файл читается потоково, без дерева python-docx
+        findings = check_with_cache(path, doc_type, rules, _cache, profile=check_profile,
+                                    low_memory=low_memory, memory_budget=memory_budget, jobs=jobs)
+        result = {"file": path, "errors": [finding.to_dict() for finding in findings]}
+    except Exception as e:
+        result = {"file": path, "error": str(e)}
+    result["seconds"] = round(time.perf_counter() - started, 3)
+    if low_memory or memory_budget is not None:
+        peak = peak_memory_mb()
+        result["peak_rss_mb"] = None if peak is None else round(peak, 1)
+    if check_profile is not None:
+        result["profile"] = check_profile.to_dict()
+    return result
+
+
+def _init_worker(rules: List[str], use_cache: bool = True):
+    # Каждый процесс пула один раз создаёт свой морфологический анализатор
+    # и дальше использует его для всех своих файлов. Без проверки
+    # терминологии анализатор не нужен и не загружается.
+    global _cache
+    _cache = open_cache() if use_cache else None
+    if "терминология" in rules:
+        get_morph()
+
+
+def _check_file_args(args) -> dict:
+    return check_file(*args)
+
+
+def run_batch(root: str, doc_type: str, rules: List[str], jobs: int, out=sys.stdout,
+              use_cache: bool = True, profile: bool = False,
+              low_memory: bool = False, memory_budget: Optional[float] = None) -> int:
+    # Проверяет все документы в пуле процессов и пишет результаты в out (JSON lines).
+    # Возвращает количество файлов, которые не удалось обработать.
+    tasks = [(str(path), doc_type, rules, profile, low_memory, memory_budget)
+             for path in find_documents(root)]
+
+    if jobs <= 1:
+        _init_worker(rules, use_cache)
+        return _write_results(map(_check_file_args, tasks), out)
+
+    if len(tasks) == 1:
+        # Один файл: все процессы работают над частями этого документа
+        _init_worker(rules, use_cache)
+        return _write_results([check_file(*tasks[0], jobs=jobs)], out)
+
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                             initargs=(rules, use_cache)) as pool:
+        # Небольшие пачки снижают накладные расходы на передачу задач
+        chunksize = max(1, min(16, len(tasks) // (jobs * 4)))
+        return _write_results(pool.map(_check_file_args, tasks, chunksize=chunksize), out)
+
+
+def _write_results(results, out) -> int:
+    failed = 0
+    for result in results:
+        if "error" in result:
+            failed += 1
+        out.write(json.dumps(result, ensure_ascii=False) + "\n")
+        out.flush()
+    return failed
+
+
+def _parse_rules(value: str) -> List[str]:
+    rules = [rule.strip() for rule in value.split(",") if rule.strip()]
+    unknown = [rule for rule in rules if rule not in CHECK_CATEGORIES]
+    if unknown:
+        raise argparse.ArgumentTypeError(
+            f"неизвестные категории: {', '.join(unknown)} "
+            f"(доступны: {', '.join(CHECK_CATEGORIES)})"
+        )
+    return rules
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="normatext", description="Проверка .docx по ГОСТ Р 7.0.97-2016")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    check = commands.add_parser("check", help="проверить файл или каталог с .docx")
+    check.add_argument("path", help="файл .docx или каталог (обходится рекурсивно)")
+    check.add_argument("--jobs", "-j", type=int, default=os.cpu_count() or 1,
+                       help="число процессов (по умолчанию — число ядер)")
+    check.add_argument("--rules", type=_parse_rules, default=list(CHECK_CATEGORIES),
+                       help="категории через запятую: " + ",".join(CHECK_CATEGORIES))
+    check.add_argument("--doc-type", default="приказ",
+                       choices=list(REQUIRED_FIELDS),
+                       help="тип документа для проверки реквизитов")
+    check.add_argument("--no-cache", action="store_true",
+                       help="не использовать кэш результатов")
+    check.add_argument("--profile", action="store_true", default=profiling_enabled(),
+                       help="добавить замеры проверки в результат (или NORMATEXT_PROFILE=1)")
+    check.add_argument("--low-memory", action="store_true",
+                       help="экономный режим для очень больших документов: абзацы проверяются "
+                            "по мере чтения, снимок документа не строится")
+    check.add_argument("--memory-budget", type=float, default=memory_budget_mb(), metavar="МБ",
+                       help="бюджет памяти процесса (или NORMATEXT_MEMORY_BUDGET_MB); "
+                            "включает экономный режим")
+    check.add_argument("--dictionary",
+                       help="скомпилированный файл словаря (или NORMATEXT_DICTIONARY)")
+
+    compile_ = commands.add_parser("compile-dictionary", help="скомпилировать словари из CSV")
+    compile_.add_argument("sources", nargs="*",
+                          help="CSV со столбцами phrase,forbidden,replacement")
+    compile_.add_argument("--builtin", action="store_true",
+                          help="добавить встроенные словари (dictionaries.py)")
+    compile_.add_argument("--output", "-o", required=True, help="файл скомпилированного словаря")
+
+    serve = commands.add_parser("serve", help="запустить службу проверки (HTTP)")
+    serve.add_argument("--host", default="127.0.0.1", help="адрес (по умолчанию только локальный)")
+    serve.add_argument("--port", type=int, default=8765)
+    serve.add_argument("--unix", help="слушать сокет Unix вместо TCP")
+    serve.add_argument("--jobs", "-j", type=int, default=os.cpu_count() or 1,
+                       help="число процессов проверки (по умолчанию — число ядер)")
+    serve.add_argument("--queue", type=int, default=32,
+                       help="сколько проверок может ждать свободного процесса; остальным — ответ 503")
+    serve.add_argument("--no-cache", action="store_true", help="не использовать кэш результатов")
+    serve.add_argument("--dictionary", help="скомпилированный файл словаря (или NORMATEXT_DICTIONARY)")
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+
+    if getattr(args, "dictionary", None):
+        # Через окружение путь наследуют и процессы пула
+        os.environ["NORMATEXT_DICTIONARY"] = os.path.abspath(args.dictionary)
+
+    if args.command == "check":
+        failed = run_batch(args.path, args.doc_type, args.rules, args.jobs,
+                           use_cache=not args.no_cache, profile=args.profile,
+                           low_memory=args.low_memory, memory_budget=args.memory_budget)
+        return 1 if failed else 0
+
+    if args.command == "compile-dictionary":
+        if not args.sources and not args.builtin:
+            sys.stderr.write("Ошибка: укажите CSV-источники или --builtin\n")
+            return 2
+        try:
+            lexicon = compile_dictionary(args.sources, args.output, get_morph(), args.builtin)
+        except (OSError, ValueError) as e:
+            sys.stderr.write(f"Ошибка: {e}\n")
+            return 1
+        sys.stderr.write(f"Запрещённых записей: {len(lexicon.forbidden)}, "
+                         f"замен: {len(lexicon.replacements)}, "
+                         f"словоформ: {len(lexicon.forms)} -> {args.output}\n")
+        return 0
+
+    if args.command == "serve":
+        # Служба импортируется только здесь: пакетной проверке asyncio не нужен
+        from server import serve
+        serve(args.host, args.port, args.jobs, args.queue, not args.no_cache, args.unix)
+        return 0
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,190 @@
+"""
+Кэш результатов проверки NormaText (SQLite).
+
+Неизменённый документ повторно не проверяется: результаты хранятся по
+SHA-256 содержимого документа, набору проверок, типу документа и версии словарей.
+Результаты проверки терминологии дополнительно хранятся по тексту каждого
+абзаца, поэтому после небольших правок заново разбираются только изменённые абзацы.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import zipfile
+from pathlib import Path
+from typing import List, Optional
+
+from core import CHECK_CATEGORIES, CheckProfile, Finding, run_checks, scan_document
+from lexicon import current_lexicon
+
+# Меняется при изменении правил проверки, чтобы старые записи не использовались
+CACHE_VERSION = "2"
+
+# Сколько хэшей абзацев запрашивать из базы за один запрос
+_LOOKUP_BATCH = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    key TEXT PRIMARY KEY,
+    findings TEXT NOT NULL,
+    created REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS paragraphs (
+    key TEXT PRIMARY KEY,
+    findings TEXT NOT NULL
+);
+"""
+
+
+def default_cache_dir() -> Path:
+    # NORMATEXT_CACHE_DIR, иначе $XDG_CACHE_HOME/normatext или ~/.cache/normatext
+    if os.environ.get("NORMATEXT_CACHE_DIR"):
+        return Path(os.environ["NORMATEXT_CACHE_DIR"])
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "normatext"
+
+
+def dictionaries_hash() -> str:
+    # Версия действующих словарей: при их изменении (в том числе при замене
+    # файла словаря во время работы) результаты кэша становятся недействительными
+    return current_lexicon().version
+
+
+def document_hash(file_path) -> str:
+    # SHA-256 частей .docx, от которых зависят проверки: основной текст, стили,
+    # колонтитулы, сноски и связи между ними. Изображения и прочие части не читаются.
+    digest = hashlib.sha256()
+    with zipfile.ZipFile(file_path) as package:
+        for name in sorted(package.namelist()):
+            if name.startswith("word/") and name.endswith((".xml", ".rels")):
+                digest.update(name.encode())
+                with package.open(name) as part:
+                    for chunk in iter(lambda: part.read(1 << 20), b""):
+                        digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    # Результаты проверок в базе SQLite. Соединение открывается на каждую
+    # операцию, поэтому кэш можно использовать из рабочих потоков и процессов.
+
+    def __init__(self, path=None):
+        self.path = Path(path) if path else default_cache_dir() / "results.sqlite3"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def document_key(self, file_path, doc_type: str, rules) -> str:
+        parts = [CACHE_VERSION, dictionaries_hash(), doc_type,
+                 ",".join(c for c in CHECK_CATEGORIES if c in rules), document_hash(file_path)]
+        return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+    def paragraph_key(self, text: str, version: Optional[str] = None) -> str:
+        # Результат проверки терминологии зависит только от текста абзаца и словарей
+        data = f"{CACHE_VERSION}\n{version or dictionaries_hash()}\n{text}"
+        return hashlib.sha256(data.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[List[Finding]]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT findings FROM documents WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        return [Finding.from_dict(item) for item in json.loads(row[0])]
+
+    def put(self, key: str, findings: List[Finding]):
+        data = json.dumps([f.to_dict() for f in findings], ensure_ascii=False)
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO documents VALUES (?, ?, ?)", (key, data, time.time()))
+
+    def load_paragraphs(self, texts) -> dict:
+        # Известные результаты терминологии для абзацев: {текст: [Finding, ...]}
+        version = dictionaries_hash()
+        keys = {self.paragraph_key(text, version): text for text in set(texts) if text.strip()}
+        memo = {}
+        key_list = list(keys)
+        with self._connect() as conn:
+            for i in range(0, len(key_list), _LOOKUP_BATCH):
+                batch = key_list[i:i + _LOOKUP_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                rows = conn.execute(
+                    f"SELECT key, findings FROM paragraphs WHERE key IN ({placeholders})", batch
+                )
+                for key, data in rows:
+                    memo[keys[key]] = [Finding.from_dict(item) for item in json.loads(data)]
+        return memo
+
+    def store_paragraphs(self, memo: dict):
+        version = dictionaries_hash()
+        rows = [
+            (self.paragraph_key(text, version), json.dumps([f.to_dict() for f in findings], ensure_ascii=False))
+            for text, findings in memo.items()
+        ]
+        with self._connect() as conn:
+            conn.executemany("INSERT OR REPLACE INTO paragraphs VALUES (?, ?)", rows)
+
+
+def open_cache(path=None) -> Optional[ResultCache]:
+    # Кэш по умолчанию; None, если он отключён (NORMATEXT_NO_CACHE=1)
+    # или базу нельзя открыть — тогда проверки просто выполняются без кэша
+    if os.environ.get("NORMATEXT_NO_CACHE") == "1":
+        return None
+    try:
+        return ResultCache(path)
+    except (OSError, sqlite3.Error):
+        return None
+
+
+def check_with_cache(file_path, doc_type: str, rules, cache: Optional[ResultCache],
+                     progress=None, cancel=None, on_result=None,
+                     profile: Optional[CheckProfile] = None,
+                     low_memory: bool = False, memory_budget: Optional[float] = None,
+                     jobs: int = 1) -> List[Finding]:
+    # run_checks с кэшем: неизменённый документ возвращается сразу,
+    # в изменённом заново разбираются только абзацы с новым текстом.
+    # В экономном режиме (low_memory, memory_budget) кэшируется только
+    # результат документа целиком: кэш абзацев требует снимка документа.
+    # jobs > 1 — большой документ проверяется по частям (см. run_checks).
+    low_memory = low_memory or memory_budget is not None
+    if cache is None:
+        return run_checks(file_path, doc_type, rules, progress, cancel, on_result, profile=profile,
+                          low_memory=low_memory, memory_budget=memory_budget, jobs=jobs)
+
+    key = cache.document_key(file_path, doc_type, rules)
+
+    cached = cache.get(key)
+    if cached is not None:
+        if profile is not None:
+            profile.cached = True
+        if on_result is not None:
+            for category in CHECK_CATEGORIES:
+                if category in rules:
+                    on_result(category, [f for f in cached if f.category == category])
+        return cached
+
+    if low_memory:
+        findings = run_checks(file_path, doc_type, rules, progress, cancel, on_result, profile=profile,
+                              low_memory=True, memory_budget=memory_budget)
+        cache.put(key, findings)
+        return findings
+
+    snapshot = scan_document(file_path, progress, cancel, profile)
+    memo = None
+    known = set()
+    if "терминология" in rules:
+        memo = cache.load_paragraphs(p.text for p in snapshot.paragraphs)
+        known = set(memo)
+
+    findings = run_checks(snapshot, doc_type, rules, progress, cancel, on_result, term_memo=memo, profile=profile,
+                          jobs=jobs)
+
+    cache.put(key, findings)
+    if memo:
+        cache.store_paragraphs({text: found for text, found in memo.items() if text not in known})
+    return findings
@@ -0,0 +1,276 @@
+"""
+Служба проверки NormaText: HTTP-сервер для системы документооборота.
+
+Пример:
+    python -m normatext serve --port 8765 --jobs 4
+    curl --data-binary @приказ.docx "http://127.0.0.1:8765/check?doc_type=приказ&rules=терминология"
+
+Морфологический анализатор и словари загружаются один раз при запуске
+в процессах пула, поэтому запрос стоит столько, сколько сама проверка.
+Документ читается потоково прямо из байтов запроса, python-docx не нужен.
+
+Каждый запрос — отдельная задача пула, запросы не собираются в пачки:
+передача документа процессу дешевле самой проверки, а от перегрузки
+защищает ограниченная очередь.
+
+POST /check — тело запроса: байты .docx; параметры doc_type и rules
+(категории через запятую, по умолчанию все). Ответ — JSON
+{"errors": [...], "seconds": ...}, ошибки в формате Finding.to_dict().
+GET /health — состояние службы.
+
+Число принятых, но не завершённых проверок ограничено: при переполнении
+очереди служба сразу отвечает 503 с заголовком Retry-After, а не копит запросы.
+Если процесс пула погиб (нехватка памяти, сбой), пул создаётся заново,
+а запрос, попавший на погибший пул, получает тот же ответ 503.
+"""
+
+import asyncio
+import io
+import json
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from lxml import etree
+
+from core import CHECK_CATEGORIES, REQUIRED_FIELDS, get_morph
+from lexicon import current_lexicon
+from result_cache import check_with_cache, open_cache
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# Сколько проверок может ждать свободного процесса сверх числа процессов
+DEFAULT_QUEUE_SIZE = 32
+
+# Наибольший размер принимаемого документа
+MAX_BODY_BYTES = 100 * 1024 * 1024
+
+# Наибольший размер строки запроса и заголовков
+_MAX_HEADER_BYTES = 64 * 1024
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            413: "Payload Too Large", 422: "Unprocessable Entity", 500: "Internal Server Error",
+            503: "Service Unavailable"}
+
+# Ошибки разбора присланного документа: ответ 422, служба работает дальше
+_DOCUMENT_ERRORS = (zipfile.BadZipFile, KeyError, ValueError, etree.XMLSyntaxError)
+
+# Кэш результатов процесса пула (задаётся в _init_worker)
+_cache = None
+
+
+def _init_worker(use_cache: bool = True):
+    # Процесс пула один раз загружает анализатор и словари
+    global _cache
+    _cache = open_cache() if use_cache else None
+    get_morph()
+    current_lexicon()
+
+
+def _warm_up() -> bool:
+    return True
+
+
+def check_document_bytes(data: bytes, doc_type: str, rules) -> dict:
+    # Выполняется в процессе пула: проверка .docx, переданного байтами
+    started = time.perf_counter()
+    findings = check_with_cache(io.BytesIO(data), doc_type, rules, _cache)
+    return {
+        "errors": [finding.to_dict() for finding in findings],
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+class HttpError(Exception):
+    # Ошибка запроса, которая возвращается клиенту с кодом status
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class CheckServer:
+    # Принимает запросы в цикле asyncio, а проверки выполняет в пуле процессов.
+    # queue_size ограничивает число проверок, ожидающих свободного процесса.
+
+    def __init__(self, jobs: int = 1, queue_size: int = DEFAULT_QUEUE_SIZE, use_cache: bool = True,
+                 max_body: int = MAX_BODY_BYTES):
+        self.jobs = max(1, jobs)
+        self.max_pending = self.jobs + max(0, queue_size)
+        self.max_body = max_body
+        self.pending = 0
+        self.served = 0
+        self.rejected = 0
+        self.use_cache = use_cache
+        self.pool = self._make_pool()
+
+    def _make_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=self.jobs, initializer=_init_worker,
+                                   initargs=(self.use_cache,))
+
+    async def warm_up(self):
+        # Запускает все процессы пула заранее, чтобы первый запрос не ждал загрузки
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self.pool, _warm_up) for _ in range(self.jobs)))
+
+    async def start(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                    unix_path: Optional[str] = None) -> asyncio.AbstractServer:
+        await self.warm_up()
+        if unix_path:
+            return await asyncio.start_unix_server(self.handle, path=unix_path, limit=_MAX_HEADER_BYTES)
+        return await asyncio.start_server(self.handle, host, port, limit=_MAX_HEADER_BYTES)
+
+    def close(self):
+        self.pool.shutdown(wait=True, cancel_futures=True)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        # Соединение обслуживает запросы по очереди, пока клиент его не закроет
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except HttpError as e:
+                    await self._respond(writer, e.status, {"error": str(e)}, keep_alive=False)
+                    return
+                if request is None:
+                    return
+
+                method, target, headers, body = request
+                keep_alive = headers.get("connection", "").lower() != "close"
+                status, payload, extra = await self._dispatch(method, target, body)
+                await self._respond(writer, status, payload, keep_alive, extra)
+                if not keep_alive:
+                    return
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader):
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError as e:
+            if e.partial.strip():
+                raise HttpError(400, "неполный запрос")
+            return None
+        except asyncio.LimitOverrunError:
+            raise HttpError(400, "слишком длинные заголовки")
+
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, _ = lines[0].split(" ", 2)
+        except ValueError:
+            raise HttpError(400, "неверная строка запроса")
+
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get("content-length", "0"))
+        except ValueError:
+            raise HttpError(400, "неверный Content-Length")
+        if length < 0:
+            raise HttpError(400, "неверный Content-Length")
+        if length > self.max_body:
+            raise HttpError(413, f"документ больше {self.max_body} байт")
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), target, headers, body
+
+    async def _dispatch(self, method: str, target: str, body: bytes) -> Tuple[int, dict, dict]:
+        url = urlsplit(target)
+        if url.path == "/health":
+            return 200, {"status": "ok", "jobs": self.jobs, "pending": self.pending,
+                         "served": self.served, "rejected": self.rejected}, {}
+        if url.path != "/check":
+            return 404, {"error": "неизвестный адрес"}, {}
+        if method != "POST":
+            return 405, {"error": "нужен POST с содержимым .docx"}, {}
+
+        try:
+            doc_type, rules = self._parse_query(url.query)
+        except HttpError as e:
+            return e.status, {"error": str(e)}, {}
+        if not body:
+            return 400, {"error": "пустое тело запроса"}, {}
+
+        # Обратное давление: при заполненной очереди запрос не принимается
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            return 503, {"error": "служба перегружена, повторите позже"}, {"Retry-After": "1"}
+
+        self.pending += 1
+        pool = self.pool
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(pool, check_document_bytes, body, doc_type, rules)
+        except BrokenProcessPool:
+            # Процесс пула погиб (нехватка памяти, сбой): пул создаётся заново,
+            # клиент повторяет запрос
+            if self.pool is pool:
+                pool.shutdown(wait=False, cancel_futures=True)
+                self.pool = self._make_pool()
+            return 503, {"error": "процесс проверки перезапущен, повторите позже"}, {"Retry-After": "1"}
+        except _DOCUMENT_ERRORS as e:
+            # Испорченный документ не должен останавливать службу
+            return 422, {"error": str(e) or type(e).__name__}, {}
+        except Exception as e:
+            return 500, {"error": str(e) or type(e).__name__}, {}
+        finally:
+            self.pending -= 1
+        self.served += 1
+        return 200, result, {}
+
+    @staticmethod
+    def _parse_query(query: str):
+        params = parse_qs(query)
+        doc_type = params.get("doc_type", ["приказ"])[0]
+        if doc_type not in REQUIRED_FIELDS:
+            raise HttpError(400, f"неизвестный тип документа: {doc_type}")
+
+        rules = list(CHECK_CATEGORIES)
+        if "rules" in params:
+            rules = [rule.strip() for rule in params["rules"][0].split(",") if rule.strip()]
+            unknown = [rule for rule in rules if rule not in CHECK_CATEGORIES]
+            if unknown:
+                raise HttpError(400, f"неизвестные категории: {', '.join(unknown)}")
+        return doc_type, rules
+
+    @staticmethod
+    async def _respond(writer: asyncio.StreamWriter, status: int, payload: dict, keep_alive: bool,
+                       extra: Optional[dict] = None):
+        body = json.dumps(payload, ensure_ascii=False).encode()
+        headers = [
+            f"HTTP/1.1 {status} {_REASONS.get(status, '')}",
+            "Content-Type: application/json; charset=utf-8",
+            f"Content-Length: {len(body)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        headers.extend(f"{name}: {value}" for name, value in (extra or {}).items())
+        writer.write(("\r\n".join(headers) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+
+async def _serve_forever(server: CheckServer, host: str, port: int, unix_path: Optional[str]):
+    listener = await server.start(host, port, unix_path)
+    address = unix_path or "http://{}:{}".format(*listener.sockets[0].getsockname()[:2])
+    print(f"NormaText слушает {address} (процессов: {server.jobs})", flush=True)
+    async with listener:
+        await listener.serve_forever()
+
+
+def serve(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, jobs: int = 1,
+          queue_size: int = DEFAULT_QUEUE_SIZE, use_cache: bool = True, unix_path: Optional[str] = None):
+    # Запускает службу и работает до Ctrl+C
+    server = CheckServer(jobs, queue_size, use_cache)
+    try:
+        asyncio.run(_serve_forever(server, host, port, unix_path))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
@@ -0,0 +1,29 @@
+import unittest
+from benchmark import generate_document, compare
+from core import scan_document, check_terminology, check_numbering
+
+
+class TestBenchmark(unittest.TestCase):
+
+    def test_generate_document_воспроизводим_и_содержит_нарушения(self):
+        first = [p.text for p in scan_document(generate_document(200, seed=1)).paragraphs]
+        second = [p.text for p in scan_document(generate_document(200, seed=1)).paragraphs]
+
+        self.assertEqual(first, second)
+        self.assertGreaterEqual(len(first), 200)
+        document = generate_document(200, seed=1)
+        self.assertTrue(check_terminology(document))
+        self.assertNotIn("numbering.no_headings", [f.rule for f in check_numbering(document)])
+
+    def test_compare_находит_замедление(self):
+        baseline = {"results": [{"size": 10, "timings": {"check_structure": 0.010, "load_document": 0.020}}]}
+        current = {"results": [{"size": 10, "timings": {"check_structure": 0.020, "load_document": 0.021}}]}
+
+        regressions = compare(current, baseline, threshold=1.25)
+
+        self.assertEqual(len(regressions), 1)
+        self.assertTrue(regressions[0].startswith("check_structure (10 абз.)"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,190 @@
+"""
+Модульные тесты обхода всех частей документа NormaText.
+Тестируются: iter_blocks и потоковое чтение таблиц, колонтитулов и сносок,
+проверки и auto_fix_terminology по этим частям, быстрое сохранение.
+"""
+
+import os
+import stat
+import tempfile
+import unittest
+import zipfile
+from unittest import mock
+from docx import Document
+from docx.oxml import parse_xml
+import core
+from core import (
+    iter_blocks,
+    iter_docx_paragraphs,
+    scan_document,
+    check_terminology,
+    check_formatting,
+    auto_fix_terminology,
+    load_document,
+    render_findings,
+    save_document
+)
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+
+FOOTNOTES_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    f'<w:footnotes xmlns:w="{W_NS}">'
+    '<w:footnote w:type="separator" w:id="-1"><w:p><w:r><w:separator/></w:r></w:p></w:footnote>'
+    '<w:footnote w:id="1"><w:p><w:r><w:t>Это штука из сноски.</w:t></w:r></w:p></w:footnote>'
+    '</w:footnotes>'
+)
+
+
+def add_footnotes(path: str):
+    # python-docx не умеет создавать сноски: часть добавляется в пакет напрямую
+    with zipfile.ZipFile(path) as package:
+        members = {name: package.read(name) for name in package.namelist()}
+
+    members["word/footnotes.xml"] = FOOTNOTES_XML.encode()
+    members["[Content_Types].xml"] = members["[Content_Types].xml"].replace(
+        b"</Types>",
+        b'<Override PartName="/word/footnotes.xml" ContentType="application/'
+        b'vnd.openxmlformats-officedocument.wordprocessingml.footnotes+xml"/></Types>'
+    )
+    members["word/_rels/document.xml.rels"] = members["word/_rels/document.xml.rels"].replace(
+        b"</Relationships>",
+        b'<Relationship Id="rIdFootnotes" Type="http://schemas.openxmlformats.org/'
+        b'officeDocument/2006/relationships/footnotes" Target="footnotes.xml"/></Relationships>'
+    )
+
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as package:
+        for name, data in members.items():
+            package.writestr(name, data)
+
+
+class TestDocumentBlocks(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "договор.docx")
+
+        doc = Document()
+        doc.add_paragraph("Договор поставки")
+        table = doc.add_table(rows=2, cols=2)
+        table.cell(1, 0).text = "Прикольный порядок оплаты"
+        table.cell(1, 1).add_table(rows=1, cols=1).cell(0, 0).text = "Вложенная штука"
+        doc.add_paragraph("После таблицы")
+        doc.sections[0].header.paragraphs[0].text = "ООО ТИПА РОМАШКА И КО"
+        doc.sections[0].footer.paragraphs[0].text = "Страница"
+        doc.save(self.path)
+        add_footnotes(self.path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_блоки_в_порядке_документа_с_местом(self):
+        blocks = [(b.area, b.location, b.index) for b in iter_blocks(load_document(self.path))
+                  if "".join(b.element.itertext()).strip()]
+        self.assertEqual(blocks, [
+            ("body", None, 0),
+            ("table", "таблица 1, строка 2, ячейка 1", 0),
+            ("table", "таблица 1, строка 2, ячейка 2, таблица 1, строка 1, ячейка 1", 0),
+            ("body", None, 1),
+            ("header", "верхний колонтитул 1", 0),
+            ("footer", "нижний колонтитул 1", 0),
+            ("footnote", "сноска 1", 0),
+        ])
+
+    def test_потоковое_чтение_совпадает_с_python_docx(self):
+        streamed = list(iter_docx_paragraphs(self.path))
+        self.assertEqual(streamed, scan_document(load_document(self.path)).paragraphs)
+
+    def test_проверки_видят_таблицы_колонтитулы_и_сноски(self):
+        errors = render_findings(check_terminology(self.path))
+        self.assertEqual(errors, [
+            "• Таблица 1, строка 2, ячейка 1, абз. 1: Недопустимое слово «Прикольный» (основа: «прикольный»)",
+            "• Таблица 1, строка 2, ячейка 2, таблица 1, строка 1, ячейка 1, абз. 1: "
+            "Недопустимое слово «штука» (основа: «штука»)",
+            "• Сноска 1, абз. 1: Недопустимое слово «штука» (основа: «штука»)",
+        ])
+        self.assertEqual(render_findings(check_formatting(self.path)),
+                         ["• Верхний колонтитул 1, абз. 1: Избегайте написания всего текста в верхнем регистре"])
+
+    def test_auto_fix_исправляет_все_части(self):
+        doc = load_document(self.path)
+        self.assertEqual(auto_fix_terminology(doc), 3)
+
+        fixed = os.path.join(self.tmp.name, "исправленный.docx")
+        doc.save(fixed)
+        self.assertEqual(check_terminology(fixed), [])
+        texts = [p.text for p in iter_docx_paragraphs(fixed)]
+        self.assertIn("Интересный порядок оплаты", texts)
+        self.assertIn("Это экземпляр из сноски.", texts)
+
+    def test_исправление_сохраняет_ссылку_на_сноску(self):
+        # Ссылка на сноску стоит в отдельном фрагменте посреди запрещённого слова,
+        # а разрыв строки — во фрагменте с исправляемым словом
+        doc = Document()
+        paragraph = doc.add_paragraph()
+        paragraph.add_run("Это шту")
+        paragraph.add_run()._r.append(parse_xml(f'<w:footnoteReference xmlns:w="{W_NS}" w:id="1"/>'))
+        run = paragraph.add_run("ка, короче.")
+        run.add_break()
+        run.add_text("Готово.")
+
+        self.assertEqual(auto_fix_terminology(doc), 2)
+        self.assertEqual([r.text for r in paragraph.runs], ["Это экземпляр", "", ", кратко говоря.\nГотово."])
+        self.assertEqual(len(paragraph._p.xpath(".//w:footnoteReference")), 1)
+        self.assertEqual(len(paragraph._p.xpath(".//w:br")), 1)
+
+        fixed = os.path.join(self.tmp.name, "исправленный.docx")
+        save_document(doc, fixed)
+        saved = Document(fixed).paragraphs[0]
+        self.assertEqual(len(saved._p.xpath(".//w:footnoteReference")), 1)
+        self.assertEqual(saved.text, "Это экземпляр, кратко говоря.\nГотово.")
+
+    def test_быстрое_сохранение_переносит_неизменённые_части(self):
+        doc = load_document(self.path)
+        auto_fix_terminology(doc)
+
+        fixed = os.path.join(self.tmp.name, "исправленный.docx")
+        rewritten = save_document(doc, fixed, self.path)
+        self.assertIn("word/document.xml", rewritten)
+        self.assertIn("word/footnotes.xml", rewritten)
+        self.assertNotIn("word/styles.xml", rewritten)
+
+        # Неизменённая часть скопирована сжатыми байтами, архив цел
+        with zipfile.ZipFile(self.path) as original, zipfile.ZipFile(fixed) as saved:
+            self.assertIsNone(saved.testzip())
+            before, after = original.getinfo("word/styles.xml"), saved.getinfo("word/styles.xml")
+            self.assertEqual((after.CRC, after.compress_size), (before.CRC, before.compress_size))
+        texts = [p.text for p in iter_docx_paragraphs(fixed)]
+        self.assertIn("Это экземпляр из сноски.", texts)
+
+    def test_сохранение_сохраняет_права_файла(self):
+        doc = load_document(self.path)
+        fixed = os.path.join(self.tmp.name, "исправленный.docx")
+
+        umask = os.umask(0o022)
+        try:
+            save_document(doc, fixed, self.path)
+        finally:
+            os.umask(umask)
+        self.assertEqual(stat.S_IMODE(os.stat(fixed).st_mode), 0o644)
+
+        # Заменяемый файл сохраняет свои права
+        os.chmod(fixed, 0o640)
+        save_document(doc, fixed, self.path)
+        self.assertEqual(stat.S_IMODE(os.stat(fixed).st_mode), 0o640)
+
+    def test_сбой_сохранения_не_портит_файл(self):
+        doc = load_document(self.path)
+        with open(self.path, "rb") as f:
+            data = f.read()
+
+        with mock.patch.object(core, "_write_package", side_effect=OSError("диск заполнен")):
+            with self.assertRaises(OSError):
+                save_document(doc, self.path, self.path)
+        with open(self.path, "rb") as f:
+            self.assertEqual(f.read(), data)
+        self.assertEqual(os.listdir(self.tmp.name), [os.path.basename(self.path)])
+
+
+if __name__ == "__main__":
+    unittest.main()
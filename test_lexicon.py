@@ -0,0 +1,271 @@
+"""
+Модульные тесты для скомпилированных словарей NormaText.
+Тестируются: PhraseMatcher, поиск многословных выражений в check_terminology
+и их замена в auto_fix_terminology с сохранением фрагментов (runs),
+компиляция словарей из CSV и их подхват без перезапуска.
+"""
+
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import Mock
+from docx import Document
+from lexicon import PhraseMatcher, compile_dictionary, current_lexicon, load_dictionary, expand_forms, BUILTIN
+from result_cache import dictionaries_hash
+from unittest.mock import patch
+import core
+from core import (check_terminology, auto_fix_terminology, render_findings,
+                  run_checks, recheck_changed, resolved_findings, Vocabulary)
+
+
+class TestPhraseMatcher(unittest.TestCase):
+
+    def test_find_однословная_и_многословная_запись(self):
+        matcher = PhraseMatcher({"штука": "экземпляр", "как бы": ""})
+        lemmas = ["это", "как", "бы", "штука"]
+        matches = list(matcher.find(lemmas))
+        self.assertEqual(matches, [(1, 3, "как бы", ""), (3, 4, "штука", "экземпляр")])
+
+    def test_find_самое_длинное_совпадение(self):
+        matcher = PhraseMatcher({"ну": 1, "ну тип": 2})
+        matches = list(matcher.find(["ну", "тип"]))
+        self.assertEqual(matches, [(0, 2, "ну тип", 2)])
+
+    def test_find_фраза_разрывается_словом_без_леммы(self):
+        matcher = PhraseMatcher({"как бы": ""})
+        self.assertEqual(list(matcher.find(["как", None, "бы"])), [])
+
+
+class TestVocabulary(unittest.TestCase):
+
+    def test_tokenize_один_проход_по_уникальным_формам(self):
+        texts = ["Это штука.", "", "Штука, и ещё (штука)", "Это штука."]
+        vocabulary = Vocabulary()
+        with patch("core._lemmatize", wraps=core._lemmatize) as lemmatize:
+            tokens = vocabulary.tokenize(texts)
+
+        self.assertEqual(list(tokens), ["Это штука.", "Штука, и ещё (штука)"])
+        second = tokens["Штука, и ещё (штука)"]
+        self.assertEqual([(s, e) for s, e in zip(second.starts, second.ends)], [(0, 6), (7, 8), (9, 12), (13, 20)])
+        self.assertEqual([vocabulary.cleans[i] for i in second.ids], ["Штука", "и", "ещё", "штука"])
+        self.assertEqual(vocabulary.lemmas[second.ids[3]], "штука")
+        # "штука." и "(штука)" — разные формы, но каждая лемматизируется один раз
+        self.assertEqual(lemmatize.call_count, len(vocabulary.cleans))
+
+
+class TestTerminologyPhrases(unittest.TestCase):
+
+    def test_check_terminology_находит_фразу(self):
+        doc = Mock()
+        doc.paragraphs = [Mock(text="Это, как бы, решение")]
+        errors = render_findings(check_terminology(doc))
+        self.assertIn("• Стр. 1: Недопустимое слово «как бы» (основа: «как бы»)", errors)
+
+    def test_auto_fix_terminology_заменяет_фразу(self):
+        doc = Document()
+        paragraph = doc.add_paragraph("Ну тип, готово.")
+        count = auto_fix_terminology(doc)
+        self.assertEqual(count, 1)
+        self.assertEqual(paragraph.text, "Например, готово.")
+
+
+class TestAutoFixRuns(unittest.TestCase):
+
+    def test_форматирование_фрагментов_сохраняется(self):
+        doc = Document()
+        paragraph = doc.add_paragraph()
+        paragraph.add_run("Это ").bold = True
+        paragraph.add_run("штука").italic = True
+        paragraph.add_run(", понятно.")
+
+        count = auto_fix_terminology(doc)
+
+        self.assertEqual(count, 1)
+        self.assertEqual([r.text for r in paragraph.runs], ["Это ", "экземпляр", ", понятно."])
+        self.assertTrue(paragraph.runs[0].bold)
+        self.assertTrue(paragraph.runs[1].italic)
+
+    def test_фраза_через_несколько_фрагментов(self):
+        doc = Document()
+        paragraph = doc.add_paragraph()
+        paragraph.add_run("Решение ")
+        paragraph.add_run("как").bold = True
+        paragraph.add_run(" бы верное")
+
+        auto_fix_terminology(doc)
+
+        self.assertEqual(paragraph.text, "Решение верное")
+        self.assertEqual(len(paragraph.runs), 3)
+
+    def test_абзац_без_совпадений_не_изменяется(self):
+        doc = Document()
+        paragraph = doc.add_paragraph("Документ согласован.")
+        xml_before = paragraph._p.xml
+        doc.add_paragraph("Это штука.")
+
+        auto_fix_terminology(doc)
+
+        self.assertEqual(paragraph._p.xml, xml_before)
+
+
+class TestInflectedReplacements(unittest.TestCase):
+
+    def _fix(self, text):
+        doc = Document()
+        paragraph = doc.add_paragraph(text)
+        auto_fix_terminology(doc)
+        return paragraph.text
+
+    def test_замена_в_падеже_и_числе_исправляемого_слова(self):
+        self.assertEqual(self._fix("Нет штуки."), "Нет экземпляра.")
+        self.assertEqual(self._fix("Прикольного мало."), "Интересного мало.")
+
+    def test_глагол_без_формы_того_же_времени_не_исправляется(self):
+        # Вид замены может отличаться, время — нет: прошедшее ставится в прошедшее,
+        # а настоящего у «отметить» нет, и ошибка остаётся неисправленной
+        self.assertEqual(self._fix("Он говорил правду."), "Он отметил правду.")
+
+        doc = Document()
+        paragraph = doc.add_paragraph("Он говорит правду.")
+        self.assertEqual(auto_fix_terminology(doc), 0)
+        self.assertEqual(paragraph.text, "Он говорит правду.")
+        self.assertEqual([f.text for f in check_terminology(doc)], ["говорит"])
+
+    def test_многословная_замена_склоняется_по_главному_слову(self):
+        self.assertEqual(self._fix("Завалом не назовёшь."), "Большим объемом работы не назовёшь.")
+        self.assertEqual(self._fix("Завалы"), "Большие объемы работы")
+
+    def test_словарная_форма_и_неизменяемая_замена(self):
+        self.assertEqual(self._fix("Это штука."), "Это экземпляр.")
+        self.assertEqual(self._fix("Короче, готово."), "Кратко говоря, готово.")
+
+
+class TestRecheckAfterFix(unittest.TestCase):
+    RULES = ["терминология", "структура", "нумерация"]
+
+    def setUp(self):
+        self.doc = Document()
+        self.doc.add_paragraph("ПРИКАЗ от 01.12.2025")
+        self.doc.add_heading("1 Назначение", 1)
+        self.doc.add_paragraph("• блин")
+        for i in range(20):
+            self.doc.add_paragraph(f"Обычный абзац номер {i} без нарушений.")
+        self.doc.add_paragraph("Это штука и ещё одна штука.")
+        self.doc.add_table(rows=1, cols=1).cell(0, 0).text = "Прикольный пункт"
+
+    def test_результат_совпадает_с_полной_проверкой(self):
+        before = run_checks(self.doc, "приказ", self.RULES)
+        changed = set()
+        auto_fix_terminology(self.doc, changed)
+
+        self.assertEqual(changed, {(None, 2), (None, 23), ("таблица 1, строка 1, ячейка 1", 0)})
+        after = recheck_changed(self.doc, before, changed, "приказ", self.RULES)
+        self.assertEqual(after, run_checks(self.doc, "приказ", self.RULES))
+        # Удаление слова "блин" оставило пустой элемент списка
+        self.assertIn("structure.empty_list_item", [f.rule for f in after])
+        self.assertEqual([f.text for f in resolved_findings(before, after)],
+                         ["блин", "штука", "штука", "Прикольный"])
+
+    def test_терминология_перепроверяется_только_в_изменённых_абзацах(self):
+        before = run_checks(self.doc, "приказ", self.RULES)
+        changed = set()
+        auto_fix_terminology(self.doc, changed)
+
+        with patch("core._find_terms", wraps=core._find_terms) as find:
+            recheck_changed(self.doc, before, changed, "приказ", self.RULES)
+
+        self.assertEqual(find.call_count, len(changed))
+
+
+class TestCompiledDictionary(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name)
+        self.source = root / "термины.csv"
+        self.artifact = root / "термины.ntdict"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _compile(self, rows):
+        self.source.write_text("phrase,forbidden,replacement\n" + "".join(rows), encoding="utf-8")
+        return compile_dictionary([self.source], self.artifact, core.get_morph())
+
+    def _errors(self, text):
+        doc = Mock()
+        doc.paragraphs = [Mock(text=text)]
+        return render_findings(check_terminology(doc))
+
+    def test_записи_лемматизируются_при_компиляции(self):
+        self._compile(["Халтуры,1,недоработка\n", "в общем и целом,1,-\n", "сделать,0,выполнить\n"])
+        lexicon = load_dictionary(self.artifact)
+
+        self.assertEqual(list(lexicon.forbidden.find(["халтура"])), [(0, 1, "халтура", "недоработка")])
+        self.assertEqual(list(lexicon.forbidden.find(["в", "общий", "и", "целое"])),
+                         [(0, 4, "в общий и целое", "")])
+        self.assertEqual(list(lexicon.forbidden.find(["сделать"])), [])
+        self.assertEqual(list(lexicon.replacements.find(["сделать"])), [(0, 1, "сделать", "выполнить")])
+
+    def test_изменённый_словарь_подхватывается_без_перезапуска(self):
+        with patch.dict(os.environ, {"NORMATEXT_DICTIONARY": str(self.artifact)}):
+            self._compile(["халтура,1,недоработка\n"])
+            self.assertEqual(self._errors("Это халтура, а не штука."),
+                             ["• Стр. 1: Недопустимое слово «халтура» (основа: «халтура»)"])
+            first = dictionaries_hash()
+
+            self._compile(["штука,1,экземпляр\n"])
+            # Отметка времени меняется явно: на некоторых ФС её точность — секунды
+            stat = self.artifact.stat()
+            os.utime(self.artifact, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+            self.assertEqual(self._errors("Это халтура, а не штука."),
+                             ["• Стр. 1: Недопустимое слово «штука» (основа: «штука»)"])
+            self.assertNotEqual(dictionaries_hash(), first)
+
+            doc = Document()
+            paragraph = doc.add_paragraph("Это штука.")
+            self.assertEqual(auto_fix_terminology(doc), 1)
+            self.assertEqual(paragraph.text, "Это экземпляр.")
+
+        self.assertIs(current_lexicon(), BUILTIN)
+
+    def test_таблица_словоформ_по_первому_разбору(self):
+        forms = expand_forms(["штука", "сталь", "всё"], core.get_morph())
+        self.assertEqual((forms["штуки"], forms["штукой"], forms["сталью"]), ("штука", "штука", "сталь"))
+        # «стали» анализатор приводит к «стать», а не к «сталь»
+        self.assertNotIn("стали", forms)
+        self.assertEqual(forms["все"], "всё")
+
+    def test_проверка_по_таблице_словоформ_без_морфологии(self):
+        texts = ["Это штука, короче.", "Штуки и штукой", "Прикольные, как бы, решения", "Короче, всё.",
+                 "Ну тип, готово."]
+        doc = Mock()
+        doc.paragraphs = [Mock(text=text) for text in texts]
+        expected = check_terminology(doc)
+
+        with patch.dict(os.environ, {"NORMATEXT_DICTIONARY": str(self.artifact)}):
+            compile_dictionary([], self.artifact, core.get_morph(), builtin=True)
+            with patch("core._lemmatize", side_effect=AssertionError("морфология не нужна")):
+                self.assertEqual(check_terminology(doc), expected)
+
+    def test_исправление_по_готовым_парадигмам_без_морфологии(self):
+        with patch.dict(os.environ, {"NORMATEXT_DICTIONARY": str(self.artifact)}):
+            compile_dictionary([], self.artifact, core.get_morph(), builtin=True)
+            doc = Document()
+            paragraph = doc.add_paragraph("Нет штуки, завалом не назовёшь.")
+            with patch("core.get_morph", side_effect=AssertionError("морфология не нужна")):
+                auto_fix_terminology(doc)
+
+        self.assertEqual(paragraph.text, "Нет экземпляра, большим объемом работы не назовёшь.")
+
+    def test_испорченный_словарь_не_заменяет_загруженный(self):
+        with patch.dict(os.environ, {"NORMATEXT_DICTIONARY": str(self.artifact)}):
+            self._compile(["халтура,1,недоработка\n"])
+            loaded = current_lexicon()
+            self.artifact.write_bytes(b"not a dictionary")
+            self.assertIs(current_lexicon(), loaded)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,12 @@
+import io
+import json
+import tempfile
 import unittest
+from pathlib import Path
+from docx import Document
 from main import NormaTextApp
+from normatext import run_batch, find_documents
+from core import _lemmatize, lemma_cache_info
 import pymorphy3
 
 class TestNormaText(unittest.TestCase):
@@ -32,4 +39,49 @@ class TestNormaText(unittest.TestCase):
         word = "слово123"
         self.assertFalse(word.isalpha())
 
+    def test_lemma_cache_hits(self):
+        "Повторная словоформа берётся из кэша лемм без разбора."
+        _lemmatize.cache_clear()
+        self.assertEqual(_lemmatize("штуку"), "штука")
+        self.assertEqual(_lemmatize("штуку"), "штука")
+        info = lemma_cache_info()
+        self.assertEqual(info.misses, 1)
+        self.assertEqual(info.hits, 1)
+
+
+class TestBatchCheck(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name)
+        (root / "sub").mkdir()
+        doc = Document()
+        doc.add_paragraph("Приказ от 01.12.2025")
+        doc.add_paragraph("Это штука.")
+        doc.save(root / "sub" / "приказ.docx")
+        (root / "битый.docx").write_bytes(b"not a zip")
+        (root / "~$временный.docx").write_bytes(b"")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_find_documents_рекурсивно_без_временных(self):
+        names = [p.name for p in find_documents(self.tmp.name)]
+        self.assertEqual(sorted(names), ["битый.docx", "приказ.docx"])
+
+    def test_run_batch_json_lines(self):
+        out = io.StringIO()
+        failed = run_batch(self.tmp.name, "приказ", ["терминология"], jobs=1, out=out,
+                           use_cache=False)
+        results = {Path(r["file"]).name: r for r in map(json.loads, out.getvalue().splitlines())}
+
+        self.assertEqual(failed, 1)
+        self.assertIn("error", results["битый.docx"])
+        errors = results["приказ.docx"]["errors"]
+        self.assertEqual([e["message"] for e in errors],
+                         ["• Стр. 2: Недопустимое слово «штука» (основа: «штука»)"])
+        self.assertEqual(errors[0]["rule"], "terminology.forbidden")
+        self.assertEqual(errors[0]["span"], [4, 9])
+        self.assertEqual(errors[0]["suggestion"], "экземпляр")
+
 "python -m unittest test_normatext.py -v"
\ No newline at end of file
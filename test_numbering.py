@@ -86,11 +86,11 @@ class TestNumberingFunctions(unittest.TestCase):
         current_numbers = {}
         h = Heading(level=1, text="Начало", paragraph_index=0, number="2")
         err = _check_sequence(h, current_numbers, 0, [])
-        self.assertIn("Первый номер на уровне 1 должен быть 1, а не 2", err)
+        self.assertIn("Первый номер на уровне 1 должен быть 1, а не 2", str(err))
 
     def test__check_sequence_пропущенный_номер(self):
         """Пропущен номер в последовательности: после 1 сразу идёт 3 — ожидается ошибка с номером 2."""
         current_numbers = {1: 1}
         h = Heading(level=1, text="Третий", paragraph_index=1, number="3")
         err = _check_sequence(h, current_numbers, 1, [])
-        self.assertIn("Ожидался номер 2, а не 3 на уровне 1", err)
\ No newline at end of file
+        self.assertIn("Ожидался номер 2, а не 3 на уровне 1", str(err))
\ No newline at end of file
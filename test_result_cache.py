@@ -0,0 +1,64 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+from docx import Document
+import core
+import result_cache
+from core import run_checks
+from result_cache import ResultCache, check_with_cache
+
+RULES = ["терминология", "структура", "нумерация"]
+
+
+class TestResultCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name)
+        self.cache = ResultCache(root / "results.sqlite3")
+        self.path = str(root / "приказ.docx")
+        self._save(["ПРИКАЗ", "Это штука.", "Короче, всё готово.", "Третий абзац."])
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _save(self, texts):
+        doc = Document()
+        for text in texts:
+            doc.add_paragraph(text)
+        doc.save(self.path)
+
+    def test_неизменённый_документ_не_проверяется_повторно(self):
+        first = check_with_cache(self.path, "приказ", RULES, self.cache)
+
+        with patch.object(result_cache, "run_checks") as run:
+            second = check_with_cache(self.path, "приказ", RULES, self.cache)
+
+        run.assert_not_called()
+        self.assertEqual(second, first)
+
+    def test_другие_проверки_не_берутся_из_кэша(self):
+        check_with_cache(self.path, "приказ", RULES, self.cache)
+        found = check_with_cache(self.path, "приказ", ["нумерация"], self.cache)
+        self.assertEqual({f.category for f in found}, {"нумерация"})
+
+    def test_после_правки_результат_как_без_кэша(self):
+        check_with_cache(self.path, "приказ", RULES, self.cache)
+        self._save(["ПРИКАЗ", "Короче, всё готово.", "Это штука.", "Типа новый абзац."])
+
+        cached = check_with_cache(self.path, "приказ", RULES, self.cache)
+        self.assertEqual(cached, run_checks(self.path, "приказ", RULES))
+
+    def test_абзацы_из_кэша_не_разбираются_заново(self):
+        check_with_cache(self.path, "приказ", ["терминология"], self.cache)
+        self._save(["ПРИКАЗ", "Это штука.", "Короче, всё готово.", "Типа новый абзац."])
+
+        with patch("core._find_terms", wraps=core._find_terms) as find:
+            check_with_cache(self.path, "приказ", ["терминология"], self.cache)
+
+        self.assertEqual([call.args[0] for call in find.call_args_list], ["Типа новый абзац."])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+"""
+Модульные тесты службы проверки NormaText (server.py).
+Тестируются: проверка .docx, переданного по HTTP, ошибки запроса
+и отказ 503 при заполненной очереди.
+"""
+
+import asyncio
+import http.client
+import io
+import json
+import os
+import signal
+import threading
+import unittest
+from urllib.parse import quote
+from docx import Document
+from core import run_checks
+from server import CheckServer
+
+
+def make_docx(texts) -> bytes:
+    doc = Document()
+    for text in texts:
+        doc.add_paragraph(text)
+    data = io.BytesIO()
+    doc.save(data)
+    return data.getvalue()
+
+
+async def _cancel_tasks():
+    # Соединения, которые ещё ждут следующего запроса, закрываются до остановки цикла
+    tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+class TestCheckServer(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # Служба работает в своём цикле asyncio в отдельном потоке
+        cls.server = CheckServer(jobs=1, queue_size=0, use_cache=False)
+        cls.loop = asyncio.new_event_loop()
+        threading.Thread(target=cls.loop.run_forever, daemon=True).start()
+        cls.listener = asyncio.run_coroutine_threadsafe(cls.server.start("127.0.0.1", 0), cls.loop).result()
+        cls.port = cls.listener.sockets[0].getsockname()[1]
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.listener.close()
+        asyncio.run_coroutine_threadsafe(cls.listener.wait_closed(), cls.loop).result()
+        asyncio.run_coroutine_threadsafe(_cancel_tasks(), cls.loop).result()
+        cls.loop.call_soon_threadsafe(cls.loop.stop)
+        cls.server.close()
+
+    def _request(self, method, path, body=None, headers=None):
+        conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=30)
+        try:
+            conn.request(method, quote(path, safe="/?=&,"), body=body, headers=headers or {})
+            response = conn.getresponse()
+            return response.status, json.loads(response.read()), response
+        finally:
+            conn.close()
+
+    def test_проверка_документа_по_http(self):
+        data = make_docx(["ПРИКАЗ от 01.12.2025", "Это штука, короче."])
+        status, payload, _ = self._request("POST", "/check?doc_type=приказ&rules=терминология,структура", data)
+
+        self.assertEqual(status, 200)
+        expected = run_checks(io.BytesIO(data), "приказ", ["терминология", "структура"])
+        self.assertEqual(payload["errors"], [finding.to_dict() for finding in expected])
+        self.assertIn("seconds", payload)
+
+    def test_ошибки_запроса(self):
+        self.assertEqual(self._request("POST", "/check?rules=орфография", b"x")[0], 400)
+        self.assertEqual(self._request("GET", "/check")[0], 405)
+        self.assertEqual(self._request("POST", "/check", b"not a docx")[0], 422)
+        status, _, response = self._request("POST", "/check", headers={"Content-Length": "-5"})
+        self.assertEqual((status, response.getheader("Connection")), (400, "close"))
+        status, payload, _ = self._request("GET", "/health")
+        self.assertEqual((status, payload["status"]), (200, "ok"))
+
+    def test_переполненная_очередь_отвечает_503(self):
+        self.server.pending = self.server.max_pending
+        try:
+            status, _, response = self._request("POST", "/check", make_docx(["ПРИКАЗ"]))
+        finally:
+            self.server.pending = 0
+        self.assertEqual(status, 503)
+        self.assertEqual(response.getheader("Retry-After"), "1")
+
+    def test_погибший_процесс_пула_перезапускается(self):
+        data = make_docx(["ПРИКАЗ"])
+        self.assertEqual(self._request("POST", "/check", data)[0], 200)
+        for process in list(self.server.pool._processes.values()):
+            os.kill(process.pid, signal.SIGKILL)
+
+        status, _, response = self._request("POST", "/check", data)
+        self.assertEqual(status, 503)
+        self.assertEqual(response.getheader("Retry-After"), "1")
+        # Следующий запрос обслуживает новый пул
+        self.assertEqual(self._request("POST", "/check", data)[0], 200)
+        self.assertEqual(self._request("POST", "/check", b"not a docx")[0], 422)
+
+
+if __name__ == "__main__":
+    unittest.main()
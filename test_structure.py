@@ -4,9 +4,28 @@
 check_paragraphs_structure, check_lists_formatting, check_fonts_and_sizes.
 """
 
+import os
+import subprocess
+import sys
+import tempfile
+import threading
 import unittest
-from unittest.mock import Mock, MagicMock
+from unittest.mock import Mock, MagicMock, PropertyMock, patch
+from docx import Document
+from docx.shared import Pt
+from docx.enum.style import WD_STYLE_TYPE
+from docx.enum.text import WD_ALIGN_PARAGRAPH
+from docx.parts.document import DocumentPart
 from core import (
+    scan_document,
+    iter_docx_paragraphs,
+    run_checks,
+    CheckCancelled,
+    MemoryBudgetExceeded,
+    render_findings,
+    Finding,
+    CheckProfile,
+    check_structure,
     check_required_fields,
     check_formatting,
     check_paragraphs_structure,
@@ -21,26 +40,26 @@ class TestStructureFunctions(unittest.TestCase):
         # Подделываем документ с текстом, содержащим "приказ"
         doc = Mock()
         doc.paragraphs = [Mock(text="Приказ №123")]
-        errors = check_required_fields(doc, "приказ")
+        errors = render_findings(check_required_fields(doc, "приказ"))
         self.assertEqual(errors, [])
 
     def test_check_required_fields_приказ_неудача(self):
         # Документ не содержит слова "приказ"
         doc = Mock()
         doc.paragraphs = [Mock(text="Служебная записка")]
-        errors = check_required_fields(doc, "приказ")
+        errors = render_findings(check_required_fields(doc, "приказ"))
         self.assertIn("• Отсутствует обязательный реквизит: 'приказ'", errors)
 
     def test_check_required_fields_отчёт_успех(self):
         doc = Mock()
         doc.paragraphs = [Mock(text="Отчёт по практике"), Mock(text="Реферат"), Mock(text="Заключение"), Mock(text="Список использованных источников")]
-        errors = check_required_fields(doc, "отчёт")
+        errors = render_findings(check_required_fields(doc, "отчёт"))
         self.assertEqual(errors, [])
 
     def test_check_required_fields_служебная_записка_успех(self):
         doc = Mock()
         doc.paragraphs = [Mock(text="Служебная записка от 01.12.2025")]
-        errors = check_required_fields(doc, "служебная записка")
+        errors = render_findings(check_required_fields(doc, "служебная записка"))
         self.assertEqual(errors, [])
 
     def test_check_formatting_выравнивание_ширина(self):
@@ -50,7 +69,7 @@ class TestStructureFunctions(unittest.TestCase):
         paragraph.alignment = 3
         doc = Mock()
         doc.paragraphs = [paragraph]
-        errors = check_formatting(doc)
+        errors = render_findings(check_formatting(doc))
         self.assertEqual(errors, [])
 
     def test_check_formatting_выравнивание_центр_ошибка(self):
@@ -60,7 +79,7 @@ class TestStructureFunctions(unittest.TestCase):
         paragraph.alignment = 1
         doc = Mock()
         doc.paragraphs = [paragraph]
-        errors = check_formatting(doc)
+        errors = render_findings(check_formatting(doc))
         self.assertIn("• Стр. 1: Рекомендуется выравнивание по ширине или левому краю", errors)
 
     def test_check_formatting_capslock_ошибка(self):
@@ -68,7 +87,7 @@ class TestStructureFunctions(unittest.TestCase):
         paragraph.text = "ЭТОТ АБЗАЦ НАПИСАН ПОЛНОСТЬЮ ЗАГЛАВНЫМИ БУКВАМИ И ОН ОЧЕНЬ ДЛИННЫЙ"
         doc = Mock()
         doc.paragraphs = [paragraph]
-        errors = check_formatting(doc)
+        errors = render_findings(check_formatting(doc))
         self.assertIn("• Стр. 1: Избегайте написания всего текста в верхнем регистре", errors)
 
     def test_check_paragraphs_structure_слишком_длинный_абзац(self):
@@ -77,7 +96,7 @@ class TestStructureFunctions(unittest.TestCase):
         paragraph.text = long_text
         doc = Mock()
         doc.paragraphs = [paragraph]
-        errors = check_paragraphs_structure(doc)
+        errors = render_findings(check_paragraphs_structure(doc))
         self.assertIn("• Стр. 1: Абзац слишком длинный (разбейте на несколько)", errors)
 
     def test_check_lists_formatting_маркированный_пустой(self):
@@ -85,7 +104,7 @@ class TestStructureFunctions(unittest.TestCase):
         paragraph.text = "• "
         doc = Mock()
         doc.paragraphs = [paragraph]
-        errors = check_lists_formatting(doc)
+        errors = render_findings(check_lists_formatting(doc))
         self.assertIn("• Стр. 1: Пустой элемент списка", errors)
 
     def test_check_lists_formatting_нумерованный_пустой(self):
@@ -93,7 +112,7 @@ class TestStructureFunctions(unittest.TestCase):
         paragraph.text = "1. "
         doc = Mock()
         doc.paragraphs = [paragraph]
-        errors = check_lists_formatting(doc)
+        errors = render_findings(check_lists_formatting(doc))
         self.assertIn("• Стр. 1: Пустой элемент нумерованного списка", errors)
 
     def test_check_fonts_and_sizes_шрифт_неверный(self):
@@ -111,7 +130,7 @@ class TestStructureFunctions(unittest.TestCase):
         doc = Mock()
         doc.paragraphs = [paragraph]
 
-        errors = check_fonts_and_sizes(doc)
+        errors = render_findings(check_fonts_and_sizes(doc))
         self.assertIn("• Обнаружены нерекомендуемые шрифты: Arial (ГОСТ: Times New Roman)", errors)
 
     def test_check_fonts_and_sizes_размер_текста_слишком_мал(self):
@@ -131,7 +150,7 @@ class TestStructureFunctions(unittest.TestCase):
         doc = Mock()
         doc.paragraphs = [paragraph]
 
-        errors = check_fonts_and_sizes(doc)
+        errors = render_findings(check_fonts_and_sizes(doc))
         self.assertIn("• Несоответствие размеров шрифта: текст: 10.0pt (требуется 12-14pt)", errors)
 
     def test_check_fonts_and_sizes_размер_заголовка_слишком_большой(self):
@@ -150,9 +169,242 @@ class TestStructureFunctions(unittest.TestCase):
         doc = Mock()
         doc.paragraphs = [paragraph]
 
-        errors = check_fonts_and_sizes(doc)
+        errors = render_findings(check_fonts_and_sizes(doc))
         self.assertIn("• Несоответствие размеров шрифта: заголовок: 18.0pt (требуется 14-16pt)", errors)
 
+    def test_check_structure_один_проход_по_абзацам(self):
+        # Все проверки структуры читают document.paragraphs только один раз
+        paragraph = Mock()
+        paragraph.text = "Приказ от 01.12.2025"
+        paragraph.alignment = 3
+        paragraph.runs = []
+        paragraph.style.name = "Normal"
+
+        doc = Mock()
+        paragraphs = PropertyMock(return_value=[paragraph])
+        type(doc).paragraphs = paragraphs
+
+        errors = render_findings(check_structure(doc, "приказ"))
+        self.assertEqual(errors, [])
+        self.assertEqual(paragraphs.call_count, 1)
+
+    def test_run_checks_по_готовому_снимку(self):
+        heading = Mock()
+        heading.text = "1 Введение"
+        heading.alignment = None
+        heading.runs = []
+        heading.style.name = "Heading 1"
+
+        doc = Mock()
+        doc.paragraphs = [heading]
+        snapshot = scan_document(doc)
+
+        self.assertEqual(snapshot.paragraphs[0].heading_level, 1)
+        self.assertIs(scan_document(snapshot), snapshot)
+        self.assertEqual(run_checks(snapshot, "приказ", ["нумерация"]), [])
+
+    def test_run_checks_прогресс_и_результаты_по_категориям(self):
+        doc = Mock()
+        doc.paragraphs = [Mock(text="Приказ от 01.12.2025", alignment=None, runs=[])]
+        events = []
+        results = []
+        findings = run_checks(doc, "приказ", ["структура", "нумерация"],
+                              progress=lambda stage, done, total: events.append((stage, done, total)),
+                              on_result=lambda category, found: results.append(category))
+
+        self.assertIn(("чтение документа", 1, 1), events)
+        self.assertEqual(results, ["структура", "нумерация"])
+        self.assertEqual(render_findings(findings), ["• Документ не содержит заголовков с нумерацией"])
+
+    def test_run_checks_отмена(self):
+        doc = Mock()
+        doc.paragraphs = [Mock(text="Текст", alignment=None, runs=[])]
+        cancel = threading.Event()
+        cancel.set()
+        with self.assertRaises(CheckCancelled):
+            run_checks(doc, "приказ", ["структура"], cancel=cancel)
+
+    def test_finding_сериализация_без_разбора_строк(self):
+        doc = Mock()
+        doc.paragraphs = [Mock(text="Текст по центру", alignment=1, runs=[])]
+        finding = check_formatting(doc)[0]
+
+        self.assertEqual(finding.rule, "structure.alignment")
+        self.assertEqual(finding.category, "структура")
+        self.assertEqual(finding.paragraph, 0)
+        self.assertEqual(Finding.from_dict(finding.to_dict()), finding)
+
+    def test_проверка_структуры_без_морфологии(self):
+        # Импорт ядра и проверка структуры не загружают pymorphy3
+        code = (
+            "import sys\n"
+            "from unittest.mock import Mock\n"
+            "import core\n"
+            "doc = Mock()\n"
+            "doc.paragraphs = [Mock(text='Приказ 2025', alignment=None, runs=[])]\n"
+            "core.run_checks(doc, 'приказ', ['структура', 'нумерация'])\n"
+            "print('pymorphy3' in sys.modules)\n"
+        )
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                                check=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+        self.assertEqual(result.stdout.strip(), "False")
+
+    def test_потоковое_чтение_совпадает_с_python_docx(self):
+        doc = Document()
+        doc.add_heading("1 Введение", 1)
+        paragraph = doc.add_paragraph()
+        run = paragraph.add_run("Текст\tс табуляцией ")
+        run.font.name = "Arial"
+        run.font.size = Pt(10)
+        paragraph.add_run("и жирным").bold = True
+        paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
+        doc.add_table(rows=1, cols=1).cell(0, 0).text = "В таблице"
+        doc.add_paragraph("После таблицы", style="List Bullet")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "документ.docx")
+            doc.save(path)
+            streamed = list(iter_docx_paragraphs(path))
+            self.assertEqual(scan_document(path).paragraphs, streamed)
+
+        self.assertEqual(streamed, scan_document(doc).paragraphs)
+        self.assertEqual(streamed[1].runs[0].size_pt, 10)
+        self.assertEqual((streamed[2].text, streamed[2].location),
+                         ("В таблице", "таблица 1, строка 1, ячейка 1"))
+        self.assertEqual((streamed[3].index, streamed[3].style_name), (2, "List Bullet"))
+
+    def test_стили_разрешаются_по_таблице_документа(self):
+        doc = Document()
+        for i in range(300):
+            doc.add_paragraph(f"Абзац {i}", style="List Bullet" if i % 2 else None)
+        doc.add_heading("1 Заголовок", 1)
+
+        with patch.object(DocumentPart, "get_style", autospec=True,
+                          side_effect=DocumentPart.get_style) as get_style:
+            snapshot = scan_document(doc)
+
+        get_style.assert_not_called()
+        self.assertEqual(snapshot.paragraphs[1].style_name, "List Bullet")
+        self.assertEqual(snapshot.paragraphs[-1].heading_level, 1)
+        self.assertEqual(check_paragraphs_structure(snapshot), [])
+
+    def test_шрифт_и_размер_наследуются_от_стилей(self):
+        doc = Document()
+        doc.styles["Normal"].font.name = "Times New Roman"
+        doc.styles["Normal"].font.size = Pt(14)
+        custom = doc.styles.add_style("Приложение", WD_STYLE_TYPE.PARAGRAPH)
+        custom.base_style = doc.styles["Normal"]
+        arial = doc.styles.add_style("Врезка", WD_STYLE_TYPE.PARAGRAPH)
+        arial.base_style = custom
+        arial.font.name = "Arial"
+        doc.add_paragraph("Текст без прямого форматирования", style="Приложение")
+        doc.add_paragraph("Текст во врезке", style="Врезка")
+
+        runs = [p.runs[0] for p in scan_document(doc).paragraphs]
+        self.assertEqual((runs[0].font_name, runs[0].size_pt), ("Times New Roman", 14))
+        self.assertEqual((runs[1].font_name, runs[1].size_pt), ("Arial", 14))
+        self.assertEqual(render_findings(check_fonts_and_sizes(doc)),
+                         ["• Обнаружены нерекомендуемые шрифты: Arial (ГОСТ: Times New Roman)"])
+
+    def test_размер_по_умолчанию_из_doc_defaults(self):
+        # В шаблоне python-docx размер текста по умолчанию 11 pt
+        doc = Document()
+        doc.add_paragraph("Обычный текст")
+        errors = render_findings(check_fonts_and_sizes(doc))
+        self.assertEqual(len(errors), 1)
+        self.assertIn("текст: 11.0pt", errors[0])
+
+    def test_профиль_проверки(self):
+        doc = Document()
+        doc.add_heading("1 Введение", 1)
+        doc.add_table(rows=1, cols=1).cell(0, 0).text = "Текст в таблице"
+        doc.add_paragraph("Приказ от 01.12.2025")
+
+        profile = CheckProfile()
+        findings = check_structure(doc, "приказ", profile=profile)
+
+        self.assertEqual(findings, check_structure(doc, "приказ"))
+        self.assertEqual(profile.paragraphs, 3)
+        self.assertEqual(profile.words, 8)
+        self.assertGreater(profile.xml_nodes, profile.paragraphs)
+        self.assertIn("FontsAndSizesChecker", profile.checkers)
+        self.assertNotIn("TerminologyChecker", profile.checkers)
+
+        run_checks(doc, "приказ", ["терминология"], profile=profile)
+        self.assertEqual(profile.paragraphs, 6)
+        self.assertEqual(profile.lemma_hits + profile.lemma_misses, 6)
+        self.assertEqual(profile.to_dict()["checkers"].keys(), profile.checkers.keys())
+
+    def test_реквизит_на_стыке_абзацев(self):
+        doc = Mock()
+        doc.paragraphs = [Mock(text="Отчёт. Реферат. Заключение. Список использованных"),
+                          Mock(text="источников")]
+        self.assertEqual(check_required_fields(doc, "отчёт"), [])
+
+        # Средний абзац короче самого длинного реквизита
+        doc.paragraphs = [Mock(text="Отчёт. Реферат. Заключение."), Mock(text="Список использованных"),
+                          Mock(text="источников")]
+        self.assertEqual(check_required_fields(doc, "отчёт"), [])
+
+        doc.paragraphs = [Mock(text="Отчёт. Реферат. Заключение. Список"), Mock(text="использованных")]
+        self.assertEqual(render_findings(check_required_fields(doc, "отчёт")),
+                         ["• Отсутствует обязательный реквизит: 'список использованных источников'"])
+
+    def test_экономный_режим_даёт_тот_же_результат(self):
+        doc = Document()
+        doc.add_paragraph("ПРИКАЗ")
+        doc.add_heading("1. Общие положения", 1)
+        doc.add_paragraph("Это штука, короче.")
+        doc.add_table(rows=1, cols=1).cell(0, 0).text = "Прикольный порядок"
+        doc.add_paragraph("•")
+        rules = ["терминология", "структура", "нумерация"]
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "приказ.docx")
+            doc.save(path)
+
+            categories = []
+            profile = CheckProfile()
+            streamed = run_checks(path, "приказ", rules, profile=profile, low_memory=True,
+                                  on_result=lambda category, found: categories.append(category))
+
+            self.assertEqual(streamed, run_checks(path, "приказ", rules))
+            self.assertEqual(categories, rules)
+            self.assertEqual(profile.paragraphs, 5)
+            self.assertIn("TerminologyChecker", profile.checkers)
+            if sys.platform != "win32":
+                self.assertGreater(profile.peak_rss_mb, 0)
+
+            with self.assertRaises(MemoryBudgetExceeded):
+                run_checks(path, "приказ", rules, memory_budget=0.001)
+
+    def test_проверка_по_частям_совпадает_с_проверкой_целиком(self):
+        doc = Document()
+        doc.add_paragraph("ПРИКАЗ от 01.12.2025")
+        for section in range(1, 5):
+            # Раздел 3 пропущен: ошибка видна, только если учесть заголовки предыдущих частей
+            number = section if section < 3 else section + 1
+            doc.add_heading(f"{number} Раздел", 1)
+            doc.add_heading(f"{number}.{section % 2 + 1} Подраздел", 2)
+            doc.add_paragraph("Это штука, короче.").runs[0].font.name = "Arial" if section == 3 else None
+            doc.add_paragraph("—")
+            doc.add_paragraph("Обычный текст").runs[0].font.size = Pt(10 + section)
+        snapshot = scan_document(doc)
+        rules = ["терминология", "структура", "нумерация"]
+
+        serial_memo, parallel_memo = {}, {}
+        serial = run_checks(snapshot, "приказ", rules, term_memo=serial_memo)
+        with patch("core.PARALLEL_MIN_PARAGRAPHS", 1):
+            categories = []
+            parallel = run_checks(snapshot, "приказ", rules, term_memo=parallel_memo, jobs=3,
+                                  on_result=lambda category, found: categories.append(category))
+
+        self.assertEqual(parallel, serial)
+        self.assertEqual(categories, rules)
+        self.assertEqual(parallel_memo, serial_memo)
+        self.assertIn("structure.fonts", {f.rule for f in parallel})
+        self.assertIn("numbering.sequence", {f.rule for f in parallel})
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,75 @@
+"""
+Модульные тесты списка находок экрана результатов NormaText (ui.FindingsList).
+Тестируются: фильтр по категориям и видам, сортировка, группировка
+и работа со 100 000 находок.
+"""
+
+import time
+import unittest
+from core import Finding
+from ui import FindingsList
+
+
+def make_findings():
+    return [
+        Finding("structure.alignment", "warning", paragraph=5),
+        Finding("terminology.forbidden", "error", paragraph=2, text="штука", lemma="штука"),
+        Finding("numbering.no_headings", "warning"),
+        Finding("terminology.forbidden", "error", paragraph=1, text="короче", lemma="короче"),
+    ]
+
+
+class TestFindingsList(unittest.TestCase):
+
+    def test_фильтр_по_категориям_и_видам(self):
+        findings = make_findings()
+        model = FindingsList(findings)
+        self.assertEqual(len(model), 4)
+        self.assertEqual(model.category_counts["терминология"], 2)
+        self.assertEqual(model.severity_counts["warning"], 2)
+
+        model.set_filter(categories=["терминология", "структура"], severities=["warning"])
+        self.assertEqual(model.visible_findings(), [findings[0]])
+
+        model.set_filter()
+        self.assertEqual(model.visible_findings(), findings)
+
+    def test_сортировка_и_группировка(self):
+        findings = make_findings()
+        model = FindingsList(findings)
+
+        model.sort_by("place")
+        self.assertEqual(model.visible_findings(), [findings[2], findings[3], findings[1], findings[0]])
+        model.sort_by("place")
+        self.assertEqual(model.visible_findings(), [findings[0], findings[1], findings[3], findings[2]])
+
+        model.sort_by("order")
+        model.set_grouped(True)
+        rows = [model.row(position) for position in range(len(model))]
+        self.assertEqual(rows, [("терминология", 2), findings[1], findings[3],
+                                ("структура", 1), findings[0],
+                                ("нумерация", 1), findings[2]])
+        self.assertEqual(model.shown, 4)
+
+        with self.assertRaises(ValueError):
+            model.sort_by("unknown")
+
+    def test_сто_тысяч_находок(self):
+        findings = [Finding("structure.alignment", "warning", paragraph=i) for i in range(100_000)]
+        findings.append(Finding("terminology.forbidden", "error", paragraph=7, text="штука", lemma="штука"))
+
+        started = time.perf_counter()
+        model = FindingsList(findings)
+        model.set_filter(severities=["error"])
+        self.assertEqual(model.visible_findings(), findings[-1:])
+        model.set_filter()
+        model.sort_by("place")
+        model.set_grouped(True)
+        self.assertEqual(len(model), len(findings) + 2)
+        self.assertEqual(model.row(1), findings[-1])
+        # Фильтр и сортировка работают над индексами, без строк и виджетов
+        self.assertLess(time.perf_counter() - started, 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
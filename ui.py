@@ -2,12 +2,273 @@
 Современный графический интерфейс NormaText с трехэтапным процессом
 """
 
+import queue
+import threading
 import tkinter as tk
+from collections import Counter
 from tkinter import ttk, filedialog, messagebox, scrolledtext
 from typing import List, Callable, Optional
 from pathlib import Path
+from core import RULE_CATEGORIES
+
+# Подписи видов нарушений и их порядок при сортировке
+SEVERITY_LABELS = {"error": "ошибка", "warning": "предупреждение"}
+_SEVERITY_ORDER = {severity: order for order, severity in enumerate(SEVERITY_LABELS)}
+_CATEGORY_ORDER = {category: order for order, category in enumerate(RULE_CATEGORIES.values())}
+
+
+def _place_key(finding):
+    # Замечания ко всему документу — первыми, затем основной текст по абзацам,
+    # затем таблицы, колонтитулы и сноски
+    paragraph = -1 if finding.paragraph is None else finding.paragraph
+    return (finding.location is not None, finding.location or "", paragraph)
+
+
+class FindingsList:
+    # Находки экрана результатов: фильтр по категориям и видам, сортировка
+    # и группировка выполняются над списком индексов, без виджетов и строк.
+    # rows — отображаемые строки: индекс находки или заголовок группы
+    # (отрицательное число, -(номер группы + 1)).
+
+    SORT_KEYS = {
+        "order": None,  # порядок проверок
+        "place": _place_key,
+        "category": lambda finding: _CATEGORY_ORDER.get(finding.category, len(_CATEGORY_ORDER)),
+        "severity": lambda finding: _SEVERITY_ORDER.get(finding.severity, len(_SEVERITY_ORDER)),
+        "message": lambda finding: finding.message,
+    }
+
+    def __init__(self, findings=()):
+        self.findings = []
+        self.category_counts = Counter()
+        self.severity_counts = Counter()
+        self.categories = None  # None — все категории
+        self.severities = None  # None — все виды
+        self.sort_key = "order"
+        self.reverse = False
+        self.grouped = False
+        self.rows: List[int] = []
+        self.groups = []  # (категория, число находок)
+        self.shown = 0
+        self.extend(findings)
+
+    def extend(self, findings):
+        findings = list(findings)
+        self.findings.extend(findings)
+        self.category_counts.update(finding.category for finding in findings)
+        self.severity_counts.update(finding.severity for finding in findings)
+        self._update()
+
+    def set_filter(self, categories=None, severities=None):
+        self.categories = None if categories is None else set(categories)
+        self.severities = None if severities is None else set(severities)
+        self._update()
+
+    def sort_by(self, key: str):
+        # Повторный выбор того же ключа меняет направление сортировки
+        if key not in self.SORT_KEYS:
+            raise ValueError(f"неизвестный ключ сортировки: {key}")
+        self.reverse = not self.reverse if key == self.sort_key else False
+        self.sort_key = key
+        self._update()
+
+    def set_grouped(self, grouped: bool):
+        self.grouped = grouped
+        self._update()
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def row(self, position: int):
+        # Находка или заголовок группы (категория, число находок) в строке position
+        value = self.rows[position]
+        return self.groups[-value - 1] if value < 0 else self.findings[value]
+
+    def visible_findings(self):
+        return [self.findings[value] for value in self.rows if value >= 0]
+
+    def _update(self):
+        findings = self.findings
+        categories, severities = self.categories, self.severities
+        indices = [index for index, finding in enumerate(findings)
+                   if (categories is None or finding.category in categories)
+                   and (severities is None or finding.severity in severities)]
+
+        key = self.SORT_KEYS[self.sort_key]
+        if key is not None:
+            indices.sort(key=lambda index: key(findings[index]), reverse=self.reverse)
+        elif self.reverse:
+            indices.reverse()
+
+        self.shown = len(indices)
+        self.groups = []
+        if not self.grouped:
+            self.rows = indices
+            return
+
+        buckets = {}
+        for index in indices:
+            buckets.setdefault(findings[index].category, []).append(index)
+        rows = []
+        for category in sorted(buckets, key=lambda c: _CATEGORY_ORDER.get(c, len(_CATEGORY_ORDER))):
+            self.groups.append((category, len(buckets[category])))
+            rows.append(-len(self.groups))
+            rows.extend(buckets[category])
+        self.rows = rows
+
+
+class FindingsTable:
+    # Виртуальный список находок: в ttk.Treeview ровно столько строк, сколько
+    # помещается на экране, и при прокрутке меняются только их значения,
+    # поэтому скорость не зависит от числа находок. Выделение хранится как
+    # строка модели (значение из FindingsList.rows), а не как строка Treeview.
+
+    COLUMNS = (("place", "Место", 230), ("category", "Категория", 120),
+               ("severity", "Вид", 130), ("message", "Сообщение", 480))
+    ROW_HEIGHT = 26
+
+    def __init__(self, parent, model: FindingsList, colors: dict):
+        self.model = model
+        self.first = 0
+        self.items = []
+        self.selected = None  # значение из model.rows выделенной строки
+
+        style = ttk.Style(parent)
+        style.configure("Findings.Treeview", rowheight=self.ROW_HEIGHT, font=("Inter", 12),
+                        background=colors["card_bg"], fieldbackground=colors["card_bg"],
+                        foreground=colors["text_dark"], borderwidth=0)
+        style.configure("Findings.Treeview.Heading", font=("Inter", 12, "bold"))
+
+        self.frame = tk.Frame(parent, bg=colors["card_bg"])
+        self.scrollbar = tk.Scrollbar(self.frame, command=self._on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
+
+        self.tree = ttk.Treeview(self.frame, columns=[name for name, _, _ in self.COLUMNS],
+                                 show="headings", selectmode="browse", height=1,
+                                 style="Findings.Treeview")
+        for name, title, width in self.COLUMNS:
+            self.tree.heading(name, text=title, anchor="w", command=lambda key=name: self.sort_by(key))
+            self.tree.column(name, width=width, anchor="w", stretch=(name == "message"))
+        self.tree.tag_configure("group", font=("Inter", 12, "bold"), background="#E5E8EF")
+        self.tree.pack(side="left", fill="both", expand=True)
+
+        self.tree.bind("<Configure>", self._on_resize)
+        self.tree.bind("<MouseWheel>", self._on_wheel)
+        self.tree.bind("<Button-4>", self._on_wheel)
+        self.tree.bind("<Button-5>", self._on_wheel)
+        self.tree.bind("<Prior>", lambda event: self.scroll(-len(self.items)))
+        self.tree.bind("<Next>", lambda event: self.scroll(len(self.items)))
+        self.tree.bind("<Up>", lambda event: self.move_selection(-1))
+        self.tree.bind("<Down>", lambda event: self.move_selection(1))
+        self.tree.bind("<<TreeviewSelect>>", self._on_select)
+
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+
+    def sort_by(self, key: str):
+        self.model.sort_by(key)
+        self.first = 0
+        self.refresh()
+
+    def scroll(self, rows: int):
+        self.first += rows
+        self.refresh()
+        return "break"
+
+    def move_selection(self, step: int):
+        # Стрелки двигают выделение по модели и прокручивают список у края экрана
+        total = len(self.model)
+        if not total:
+            return "break"
+        try:
+            position = self.model.rows.index(self.selected) + step
+        except ValueError:
+            position = self.first
+        position = max(0, min(position, total - 1))
+        self.selected = self.model.rows[position]
+        if position < self.first:
+            self.first = position
+        elif position >= self.first + len(self.items):
+            self.first = position - len(self.items) + 1
+        self.refresh()
+        return "break"
+
+    def refresh(self):
+        # Перерисовывает только видимые строки с позиции first
+        # и ставит выделение на строку, где сейчас выделенная находка
+        total = len(self.model)
+        visible = len(self.items)
+        self.first = max(0, min(self.first, total - visible))
+        selected_item = None
+        for offset, item in enumerate(self.items):
+            position = self.first + offset
+            if position < total:
+                values, tags = self._row_values(self.model.row(position))
+                if self.model.rows[position] == self.selected:
+                    selected_item = item
+            else:
+                values, tags = ("", "", "", ""), ()
+            self.tree.item(item, values=values, tags=tags)
+
+        if selected_item is not None:
+            self.tree.selection_set(selected_item)
+            self.tree.focus(selected_item)
+        elif self.tree.selection():
+            self.tree.selection_remove(*self.tree.selection())
+
+        if total:
+            self.scrollbar.set(self.first / total, min(1.0, (self.first + visible) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    @staticmethod
+    def _row_values(row):
+        if isinstance(row, tuple):
+            category, count = row
+            return (f"{category.capitalize()}: {count}", "", "", ""), ("group",)
+        return (row.place or "Документ", row.category, SEVERITY_LABELS.get(row.severity, row.severity),
+                row.message), ()
+
+    def _on_select(self, event):
+        # Щелчок по строке: запоминается строка модели под ней
+        selection = self.tree.selection()
+        if not selection or selection[0] not in self.items:
+            return
+        position = self.first + self.items.index(selection[0])
+        if position < len(self.model):
+            self.selected = self.model.rows[position]
+        else:
+            self.tree.selection_remove(selection[0])
+
+    def _on_resize(self, event):
+        # Число строк пула — сколько помещается под заголовком таблицы
+        visible = max(1, event.height // self.ROW_HEIGHT - 1)
+        while len(self.items) < visible:
+            self.items.append(self.tree.insert("", "end", values=("", "", "", "")))
+        while len(self.items) > visible:
+            self.tree.delete(self.items.pop())
+        self.refresh()
+
+    def _on_scrollbar(self, action, value, unit=None):
+        if action == "moveto":
+            self.first = int(float(value) * len(self.model))
+            self.refresh()
+        elif action == "scroll":
+            step = len(self.items) if unit == "pages" else 1
+            self.scroll(int(value) * step)
+
+    def _on_wheel(self, event):
+        if event.num == 4:
+            return self.scroll(-3)
+        if event.num == 5:
+            return self.scroll(3)
+        return self.scroll(-3 if event.delta > 0 else 3)
+
 
 class ModernNormaTextUI:
+    # Период опроса очереди событий рабочего потока проверки, мс
+    POLL_INTERVAL_MS = 50
+
     def __init__(self, root: tk.Tk, on_check: Callable, on_export: Callable, on_auto_fix: Callable, on_save: Callable):
         self.root = root
         self.root.title("NormaText")
@@ -38,6 +299,11 @@ class ModernNormaTextUI:
         self.container = tk.Frame(self.root, bg=self.colors["background_light"])
         self.container.pack(fill="both", expand=True)
 
+        # Рабочий поток проверки передаёт события в очередь, которую
+        # основной цикл Tk разбирает через root.after
+        self._check_events = None
+        self._cancel_event = None
+
         self.current_screen = None
         self._create_screen1()  # Начинаем с первого экрана
 
@@ -355,8 +621,8 @@ class ModernNormaTextUI:
         check_canvas.bind("<Enter>", on_check_enter)
         check_canvas.bind("<Leave>", on_check_leave)
 
-    def _create_screen3(self, errors: List[str]):
-        """Третий экран - результаты проверки"""
+    def _create_screen3(self, errors: list, running: bool = False):
+        """Третий экран - результаты проверки (running=True - проверка ещё идёт)"""
 
         self.current_errors = errors
 
@@ -394,42 +660,61 @@ class ModernNormaTextUI:
         main_container.pack(fill="both", expand=True, padx=40, pady=20)
 
         # Заголовок
-        screen_title = tk.Label(main_container, text="Результаты проверки",
+        screen_title = tk.Label(main_container,
+                                text="Проверка выполняется" if running else "Результаты проверки",
                                 font=("Inter", 28, "bold"),
                                 bg=self.colors["background_light"],
                                 fg=self.colors["text_dark"])
         screen_title.pack(pady=(0, 20), anchor="w")
 
-        # Область для результатов с прокруткой
-        results_container = tk.Frame(main_container, bg=self.colors["background_light"])
-        results_container.pack(fill="both", expand=True, pady=(0, 20))
-
-        # Создаем Scrollbar и Text вручную для лучшего контроля
-        scrollbar = tk.Scrollbar(results_container)
-        scrollbar.pack(side="right", fill="y")
-
-        self.results_text = tk.Text(results_container,
-                                    wrap=tk.WORD,
-                                    font=("Inter", 14),
-                                    bg=self.colors["card_bg"],
-                                    fg=self.colors["text_dark"],
-                                    relief="flat",
-                                    borderwidth=0,
-                                    padx=20,
-                                    pady=20,
-                                    yscrollcommand=scrollbar.set)
-        self.results_text.pack(side="left", fill="both", expand=True)
-
-        scrollbar.config(command=self.results_text.yview)
-
-        # Вставляем текст
-        if errors:
-            report = "Проверка завершена.\n\nНайденные ошибки:\n" + "\n".join(errors)
-        else:
-            report = "Проверка завершена.\n\nОшибок не найдено!"
-
-        self.results_text.insert(tk.END, report)
-        self.results_text.config(state="disabled")
+        # Ход проверки: этап и номер абзаца
+        if running:
+            self.progress_label = tk.Label(main_container, text="Чтение документа...",
+                                           font=("Inter", 14),
+                                           bg=self.colors["background_light"],
+                                           fg=self.colors["text_dark"])
+            self.progress_label.pack(anchor="w")
+
+            self.progress_bar = ttk.Progressbar(main_container, mode="determinate", maximum=100)
+            self.progress_bar.pack(fill="x", pady=(5, 20))
+
+        # Фильтры: категории, виды нарушений и группировка по категориям.
+        # Фильтр меняет только список строк, виджеты не пересоздаются
+        self.findings_list = FindingsList(errors)
+        self.results_running = running
+        filters_frame = tk.Frame(main_container, bg=self.colors["background_light"])
+        filters_frame.pack(fill="x", pady=(0, 10))
+
+        self.filter_vars = {}
+        self.filter_buttons = {}
+        for key, label, counts in ([(category, category.capitalize(), "category_counts")
+                                    for category in RULE_CATEGORIES.values()]
+                                   + [(severity, label.capitalize(), "severity_counts")
+                                      for severity, label in SEVERITY_LABELS.items()]):
+            var = tk.BooleanVar(value=True)
+            button = tk.Checkbutton(filters_frame, variable=var, font=("Inter", 12),
+                                    bg=self.colors["background_light"], fg=self.colors["text_dark"],
+                                    activebackground=self.colors["background_light"],
+                                    command=self._apply_findings_filter)
+            button.pack(side="left", padx=(0, 10))
+            self.filter_vars[key] = var
+            self.filter_buttons[key] = (button, label, counts)
+
+        self.group_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(filters_frame, text="По категориям", variable=self.group_var, font=("Inter", 12),
+                       bg=self.colors["background_light"], fg=self.colors["text_dark"],
+                       activebackground=self.colors["background_light"],
+                       command=self._apply_findings_filter).pack(side="left")
+
+        # Итог проверки и число показанных находок
+        self.summary_label = tk.Label(main_container, font=("Inter", 14),
+                                      bg=self.colors["background_light"], fg=self.colors["text_dark"])
+        self.summary_label.pack(anchor="w", pady=(0, 5))
+
+        # Список находок: отрисовываются только видимые строки
+        self.findings_table = FindingsTable(main_container, self.findings_list, self.colors)
+        self.findings_table.pack(fill="both", expand=True, pady=(0, 20))
+        self._update_findings_summary(running)
 
         # Функция для круглых кнопок
         def round_rectangle(canvas, x1, y1, x2, y2, radius=25, **kwargs):
@@ -451,11 +736,14 @@ class ModernNormaTextUI:
         actions_frame = tk.Frame(main_container, bg=self.colors["background_light"])
         actions_frame.pack(fill="x", pady=(10, 0))
 
-        buttons_config = [
-            ("Исправить автоматически", self.on_auto_fix),
-            ("Скачать исправленный", self.on_save),
-            ("Экспортировать ошибки в TXT", self.on_export)
-        ]
+        if running:
+            buttons_config = [("Отменить проверку", self._cancel_check)]
+        else:
+            buttons_config = [
+                ("Исправить автоматически", self.on_auto_fix),
+                ("Скачать исправленный", self.on_save),
+                ("Экспортировать ошибки в TXT", self.on_export)
+            ]
 
         for text, command in buttons_config:
             btn_frame = tk.Frame(actions_frame, bg=self.colors["background_light"])
@@ -490,6 +778,10 @@ class ModernNormaTextUI:
             canvas.bind("<Enter>", on_enter)
             canvas.bind("<Leave>", on_leave)
 
+        # Во время проверки вернуться можно только через отмену
+        if running:
+            return
+
         # Кнопка "Проверить другой документ" - ТОЖЕ В ОТДЕЛЬНОМ ФРЕЙМЕ
         back_frame = tk.Frame(main_container, bg=self.colors["background_light"])
         back_frame.pack(fill="x", pady=(20, 0))
@@ -530,19 +822,121 @@ class ModernNormaTextUI:
             messagebox.showwarning("Внимание", "Выберите категории проверки!")
             return
 
+        # Проверка идёт в рабочем потоке, окно остаётся отзывчивым
+        doc_type = self.doc_type_var.get()
+        self._check_events = queue.Queue()
+        self._cancel_event = threading.Event()
+        self._create_screen3([], running=True)
+
+        worker = threading.Thread(target=self._check_worker,
+                                  args=(self.file_path, doc_type, selected_rules,
+                                        self._check_events, self._cancel_event),
+                                  daemon=True)
+        worker.start()
+        self.root.after(self.POLL_INTERVAL_MS, self._poll_check_events, self._check_events)
+
+    def _check_worker(self, file_path: str, doc_type: str, rules: List[str],
+                      events: queue.Queue, cancel: threading.Event):
+        """Рабочий поток: выполняет проверку и передаёт события в очередь (без обращений к tkinter)"""
+        def progress(stage, done, total):
+            events.put(("progress", stage, done, total))
+
+        def on_result(category, found):
+            events.put(("result", category, found))
+
         try:
             # Вызываем основную функцию проверки
-            self.on_check(self.file_path, self.doc_type_var.get(), selected_rules)
+            errors = self.on_check(file_path, doc_type, rules,
+                                   progress=progress, cancel=cancel, on_result=on_result)
+            events.put(("done", errors))
         except Exception as e:
-            messagebox.showerror("Ошибка", f"Не удалось обработать файл:\n{str(e)}")
+            if cancel.is_set():
+                events.put(("cancelled",))
+            else:
+                events.put(("error", str(e)))
+
+    def _poll_check_events(self, events: queue.Queue):
+        """Разбирает события рабочего потока в основном цикле Tk"""
+        try:
+            while True:
+                event = events.get_nowait()
+                kind = event[0]
+
+                if kind == "progress":
+                    self._show_progress(*event[1:])
+                elif kind == "result":
+                    self._append_results(*event[1:])
+                elif kind == "done":
+                    self.update_report(event[1])
+                    return
+                elif kind == "cancelled":
+                    self._create_screen2()
+                    return
+                elif kind == "error":
+                    messagebox.showerror("Ошибка", f"Не удалось обработать файл:\n{event[1]}")
+                    self._create_screen2()
+                    return
+        except queue.Empty:
+            pass
+
+        self.root.after(self.POLL_INTERVAL_MS, self._poll_check_events, events)
+
+    def _show_progress(self, stage: str, done: int, total: int):
+        """Показывает этап проверки и номер обрабатываемого абзаца"""
+        if not hasattr(self, 'progress_label') or not self.progress_label.winfo_exists():
+            return
+        # total == 0: при потоковом чтении число абзацев заранее неизвестно
+        position = f"абзац {done} из {total}" if total else f"абзац {done}"
+        self.progress_label.config(text=f"{stage.capitalize()}: {position}")
+        self.progress_bar["value"] = done * 100 / total if total else 100
+
+    def _append_results(self, category: str, found: list):
+        """Добавляет ошибки завершившейся категории на экран результатов"""
+        if not hasattr(self, 'findings_table') or not self.findings_table.tree.winfo_exists():
+            return
+        self.findings_list.extend(found)
+        self.findings_table.refresh()
+        self._update_findings_summary(running=True)
+
+    def _apply_findings_filter(self):
+        """Применяет фильтры и группировку к списку находок"""
+        categories = [c for c in RULE_CATEGORIES.values() if self.filter_vars[c].get()]
+        severities = [s for s in SEVERITY_LABELS if self.filter_vars[s].get()]
+        self.findings_list.set_filter(categories, severities)
+        self.findings_list.set_grouped(self.group_var.get())
+        self.findings_table.first = 0
+        self.findings_table.refresh()
+        self._update_findings_summary(self.results_running)
+
+    def _update_findings_summary(self, running: bool = False):
+        """Обновляет число находок в подписях фильтров и строку итога"""
+        findings = self.findings_list
+        for key, (button, label, counts) in self.filter_buttons.items():
+            button.config(text=f"{label} ({getattr(findings, counts)[key]})")
+
+        total = len(findings.findings)
+        if running:
+            text = f"Проверка выполняется... Найдено ошибок: {total}"
+        elif not total:
+            text = "Проверка завершена. Ошибок не найдено!"
+        else:
+            text = f"Проверка завершена. Найдено ошибок: {total}, показано: {findings.shown}"
+        self.summary_label.config(text=text)
+
+    def _cancel_check(self):
+        """Запрашивает остановку проверки; рабочий поток завершится на ближайшем абзаце"""
+        if self._cancel_event is not None:
+            self._cancel_event.set()
+        if hasattr(self, 'progress_label') and self.progress_label.winfo_exists():
+            self.progress_label.config(text="Отмена проверки...")
 
-    def update_report(self, errors: List[str]):
+    def update_report(self, errors: list):
         """Обновляет отчет с ошибками (вызывается из main.py)"""
         # Просто переходим на 3й экран с переданным списком ошибок
         self._create_screen3(errors)
 
     def get_report_text(self) -> str:
-        """Возвращает текст отчета"""
-        if hasattr(self, 'results_text'):
-            return self.results_text.get(1.0, tk.END).strip()
-        return ""
\ No newline at end of file
+        """Возвращает текст отчета (находки с учётом фильтров и сортировки)"""
+        if hasattr(self, 'findings_list'):
+            return "\n".join(map(str, self.findings_list.visible_findings()))
+        return ""